@@ -0,0 +1,322 @@
+"""Benchmarks for puzzle generation, solving and UI refresh
+
+Every run uses fixed seeds and a fixed corpus, so results from two runs on
+the same machine can be compared. Results are written as JSON and can be
+checked against a stored baseline:
+
+    python sudoku.py bench --output baseline.json
+    python sudoku.py bench --baseline baseline.json
+"""
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+from sudoku_engine import (
+    BacktrackSolver, ConstraintBoard, Geometry, GridSource, PuzzleCodec, PuzzlePool,
+    SOLVERS, SudokuGame
+)
+
+
+# Known hard puzzles, all with a unique solution
+HARD_PUZZLES = {
+    "AI Escargot":
+        "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+    "Inkala 2010":
+        "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    "Easter Monster":
+        "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    "top95 #1":
+        "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+    "top95 #2":
+        "52...6.........7.13...........4..8..6......5...........418.........3..2...87.....",
+    "top95 #3":
+        "6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....",
+    "top95 #4":
+        "48.3............71.2.......7.5....6....2..8.............1.76...3.....4......5....",
+    # Worst case for a left-to-right brute force search
+    "Brute-force worst case":
+        "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9"
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(times, nodes=None, peak=None):
+    """Latency percentiles in milliseconds plus node counts and peak memory"""
+    result = {
+        'runs': len(times),
+        'mean_ms': sum(times) / len(times) * 1000,
+        'p50_ms': percentile(times, 50) * 1000,
+        'p90_ms': percentile(times, 90) * 1000,
+        'p99_ms': percentile(times, 99) * 1000,
+        'max_ms': max(times) * 1000
+    }
+    if nodes is not None:
+        result['nodes_mean'] = sum(nodes) / len(nodes)
+        result['nodes_max'] = max(nodes)
+    if peak is not None:
+        result['peak_kb'] = peak / 1024
+    return result
+
+
+def measure(run, runs):
+    """Time run(i) for each i; returns (times, nodes) where run returns nodes"""
+    # One untimed warm-up run so one-off setup does not land in the timings
+    run(0)
+    times = []
+    nodes = []
+    for i in range(runs):
+        start = time.perf_counter()
+        count = run(i)
+        times.append(time.perf_counter() - start)
+        nodes.append(count)
+    return times, nodes
+
+
+def peak_memory(run):
+    """Peak traced allocation of one extra run, measured apart from timing"""
+    tracemalloc.start()
+    try:
+        run(0)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def check_corpus():
+    """Make sure every corpus puzzle has exactly one solution"""
+    solver = SOLVERS["dlx"]()
+    for name, line in HARD_PUZZLES.items():
+        if solver.count_solutions(PuzzleCodec.line_to_board(line), 2) != 1:
+            raise ValueError(f"Corpus puzzle {name} does not have a unique solution")
+
+
+def bench_generate(solver_name, difficulty, runs, graded=False):
+    """generate_puzzle with fixed seeds"""
+    game = SudokuGame(solver_name, graded=graded)
+    
+    def run(i):
+        before = game.solver.nodes + game.filler.nodes
+        game.generate_puzzle(difficulty, seed=f"bench-{difficulty}-{i}")
+        return game.solver.nodes + game.filler.nodes - before
+    
+    times, nodes = measure(run, runs)
+    return summarize(times, nodes, peak_memory(run))
+
+
+def bench_fill(runs):
+    """_fill_board from an empty grid"""
+    game = SudokuGame()
+    
+    def run(i):
+        game.rng.seed(f"bench-fill-{i}")
+        game.constraints = ConstraintBoard()
+        before = game.filler.nodes
+        game._fill_board()
+        return game.filler.nodes - before
+    
+    times, nodes = measure(run, runs)
+    return summarize(times, nodes, peak_memory(run))
+
+
+def bench_fill_transformed(runs):
+    """_fill_board from a GridSource that only transforms one seed grid"""
+    source = GridSource()
+    source.next(random.Random("bench-fill-seed"))
+    game = SudokuGame(grid_source=source)
+    
+    def run(i):
+        game.rng.seed(f"bench-fill-{i}")
+        game.constraints = ConstraintBoard()
+        game._fill_board()
+        return 0
+    
+    times, nodes = measure(run, runs)
+    return summarize(times, nodes, peak_memory(run))
+
+
+def bench_count(solver_name, line, runs):
+    """_count_solutions on one corpus puzzle"""
+    game = SudokuGame(solver_name)
+    board = PuzzleCodec.line_to_board(line)
+    
+    def run(i):
+        before = game.solver.nodes
+        game._count_solutions(board, 2)
+        return game.solver.nodes - before
+    
+    times, nodes = measure(run, runs)
+    return summarize(times, nodes, peak_memory(run))
+
+
+def make_headless_ui():
+    """A SudokuUI on mocked Tk widgets, without a display or a puzzle pool"""
+    import sudoku_ui
+    
+    def canvas(*args, **kwargs):
+        widget = mock.MagicMock()
+        widget.winfo_width.return_value = 600
+        widget.winfo_height.return_value = 600
+        return widget
+    
+    tk = mock.MagicMock()
+    tk.Canvas = canvas
+    patches = [
+        mock.patch.object(sudoku_ui, 'tk', tk),
+        mock.patch.object(sudoku_ui, 'ttk', mock.MagicMock()),
+        mock.patch.object(sudoku_ui, 'font', mock.MagicMock()),
+        mock.patch.object(sudoku_ui, 'messagebox', mock.MagicMock()),
+        mock.patch.object(sudoku_ui, 'PuzzlePool',
+                          lambda **kwargs: PuzzlePool(start=False, **kwargs))
+    ]
+    for patch in patches:
+        patch.start()
+    ui = sudoku_ui.SudokuUI(mock.MagicMock())
+    # The UI starts generating its first puzzle; stop it competing for the CPU
+    if ui.generation_cancel is not None:
+        ui.generation_cancel.set()
+    
+    # Widget variables as plain values, so reads cost what they would in Tk
+    for name in ('note_mode_var', 'highlight_var', 'highlight_same_var'):
+        variable = mock.MagicMock()
+        variable.get.return_value = name != 'note_mode_var'
+        setattr(ui, name, variable)
+    return ui, patches
+
+
+def bench_ui(runs):
+    """update_board_display (full repaint, also on 25x25) and one-cell refresh"""
+    try:
+        ui, patches = make_headless_ui()
+    except ImportError as e:
+        return {'skipped': f"tkinter unavailable: {e}"}
+    
+    try:
+        game = ui.game
+        game.generate_puzzle("Hard", seed="bench-ui")
+        empty = [(r, c) for r in range(9) for c in range(9) if game.board[r][c] == 0]
+        ui.selected_cell = empty[0]
+        
+        def full(i):
+            ui.painted = [[None] * ui.size for _ in range(ui.size)]
+            ui.update_board_display()
+        
+        def move(i):
+            row, col = empty[i % len(empty)]
+            game.place_number(row, col, game.solution[row][col])
+            game.clear_cell(row, col)
+        
+        full_times, _ = measure(full, runs)
+        move_times, _ = measure(move, runs)
+        results = {
+            'update_board_display': summarize(full_times, peak=peak_memory(full)),
+            'place_and_clear': summarize(move_times, peak=peak_memory(move))
+        }
+        
+        # A 625-cell board with every other cell given
+        grid = ConstraintBoard(geometry=Geometry.of(25))
+        BacktrackSolver().fill(grid, random.Random("bench-ui-25").shuffle)
+        solution = grid.to_list()
+        game.load_puzzle([[v if (r + c) % 2 else 0 for c, v in enumerate(row)]
+                          for r, row in enumerate(solution)], solution, "Hard")
+        ui.selected_cell = (0, 1)
+        big_times, _ = measure(full, runs)
+        results['update_board_display_25x25'] = summarize(big_times, peak=peak_memory(full))
+        return results
+    finally:
+        for patch in patches:
+            patch.stop()
+
+
+def run_benchmarks(runs=20, solvers=None, difficulties=None, ui=True, progress=None):
+    """Run every benchmark; returns the JSON-ready results"""
+    check_corpus()
+    solvers = solvers or list(SOLVERS)
+    difficulties = difficulties or list(SudokuGame.CELLS_TO_REMOVE)
+    results = {}
+    
+    def record(key, result):
+        results[key] = result
+        if progress:
+            progress(key, result)
+    
+    record("fill", bench_fill(runs))
+    record("fill/transformed", bench_fill_transformed(runs))
+    for solver_name in solvers:
+        for difficulty in difficulties:
+            record(f"generate/{difficulty}/{solver_name}",
+                   bench_generate(solver_name, difficulty, runs))
+        for name, line in HARD_PUZZLES.items():
+            record(f"count/{name}/{solver_name}", bench_count(solver_name, line, runs))
+    if ui:
+        for name, result in bench_ui(runs * 10).items():
+            record(f"ui/{name}", result)
+    
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'runs': runs,
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        'results': results
+    }
+
+
+def compare(results, baseline, metric="p50_ms", tolerance=0.2):
+    """List (key, old, new) for every result slower than baseline by tolerance"""
+    regressions = []
+    for key, result in results['results'].items():
+        old = baseline.get('results', {}).get(key, {}).get(metric)
+        new = result.get(metric)
+        if old is not None and new is not None and new > old * (1 + tolerance):
+            regressions.append((key, old, new))
+    return regressions
+
+
+def run_bench(args):
+    """Command line entry point; exits non-zero on regressions"""
+    def progress(key, result):
+        if 'skipped' in result:
+            print(f"{key:45} skipped ({result['skipped']})", file=sys.stderr)
+            return
+        line = f"{key:45} p50 {result['p50_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms"
+        if 'nodes_mean' in result:
+            line += f"  nodes {result['nodes_mean']:10.1f}"
+        if 'peak_kb' in result:
+            line += f"  peak {result['peak_kb']:8.1f} KB"
+        print(line, file=sys.stderr)
+    
+    results = run_benchmarks(
+        args.runs,
+        [args.solver] if args.solver else None,
+        [args.difficulty] if args.difficulty else None,
+        not args.no_ui,
+        progress
+    )
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.metric, args.tolerance)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {args.metric} {old:.3f} -> {new:.3f}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline", file=sys.stderr)
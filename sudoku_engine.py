@@ -0,0 +1,2747 @@
+"""Sudoku engine: boards, solvers, puzzle generation and game state
+
+Nothing here imports tkinter, so worker processes, servers and command line
+tools can use the engine without a display.
+"""
+import random
+import time
+import json
+import struct
+import mmap
+import tempfile
+import shutil
+import copy
+from array import array
+from bisect import bisect_right
+import threading
+from collections import deque, namedtuple
+from itertools import combinations
+from datetime import datetime
+
+class Geometry:
+    """Cell, unit and peer tables for an N²×N² board made of N×N boxes"""
+    
+    # Symbols for values 1..25; boards up to 9x9 only ever use the digits
+    SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+    _cache = {}
+    
+    def __init__(self, box):
+        size = box * box
+        self.box = box
+        self.size = size
+        self.cells = size * size
+        # Digit n is stored as bit (n - 1); a full unit has all size bits set
+        self.all_digits = (1 << size) - 1
+        
+        self.box_index = [[(r // box) * box + c // box for c in range(size)]
+                          for r in range(size)]
+        self.units = (
+            [[(r, c) for c in range(size)] for r in range(size)] +
+            [[(r, c) for r in range(size)] for c in range(size)] +
+            [[(b // box * box + i // box, b % box * box + i % box) for i in range(size)]
+             for b in range(size)]
+        )
+        self.cell_units = [[(r, size + c, 2 * size + self.box_index[r][c])
+                            for c in range(size)] for r in range(size)]
+        self.peers = [[sorted(set(self.units[r] + self.units[size + c] +
+                                  self.units[2 * size + self.box_index[r][c]]) - {(r, c)})
+                       for c in range(size)] for r in range(size)]
+        
+        # The same geometry on flat cell indexes, for the logical solver
+        self.unit_index = [[r * size + c for r, c in unit] for unit in self.units]
+        self.peer_index = [frozenset(r * size + c for r, c in self.peers[i // size][i % size])
+                           for i in range(self.cells)]
+    
+    @classmethod
+    def of(cls, size):
+        """Shared geometry for a board with the given side (4, 9, 16 or 25)"""
+        geometry = cls._cache.get(size)
+        if geometry is None:
+            box = int(size ** 0.5)
+            if box * box != size or not 2 <= box <= 5:
+                raise ValueError(f"Unsupported board size: {size}")
+            geometry = cls._cache[size] = cls(box)
+        return geometry
+    
+    def empty_board(self):
+        """A new board of zeros"""
+        return [[0] * self.size for _ in range(self.size)]
+    
+    def symbol(self, value):
+        """Display symbol of a value; empty cells are ''"""
+        return self.SYMBOLS[value - 1] if value else ""
+    
+    def value_of(self, symbol):
+        """Value of a display symbol, case-insensitive; 0 if it is not one"""
+        value = self.SYMBOLS.find(symbol.upper()) + 1
+        return value if value <= self.size else 0
+
+
+# Tables for the standard 9x9 board
+STANDARD = Geometry.of(9)
+ALL_DIGITS = STANDARD.all_digits
+BOX_INDEX = STANDARD.box_index
+UNITS = STANDARD.units
+CELL_UNITS = STANDARD.cell_units
+PEERS = STANDARD.peers
+UNIT_INDEX = STANDARD.unit_index
+PEER_INDEX = STANDARD.peer_index
+
+
+class ConstraintBoard:
+    """Row, column and box occupancy kept as digit bitmasks"""
+    
+    def __init__(self, board=None, geometry=None):
+        if geometry is None:
+            geometry = STANDARD if board is None else Geometry.of(len(board))
+        self.geometry = geometry
+        self.grid = geometry.empty_board()
+        self.rows = [0] * geometry.size
+        self.cols = [0] * geometry.size
+        self.boxes = [0] * geometry.size
+        if board is not None:
+            self.load(board)
+    
+    def load(self, board):
+        """Rebuild the masks from a list of lists"""
+        size = self.geometry.size
+        self.rows = [0] * size
+        self.cols = [0] * size
+        self.boxes = [0] * size
+        for row in range(size):
+            for col in range(size):
+                self.grid[row][col] = 0
+                if board[row][col] != 0:
+                    self.place(row, col, board[row][col])
+    
+    def candidates(self, row, col):
+        """Mask of digits that can still go at (row, col)"""
+        return ~self.used(row, col) & self.geometry.all_digits
+    
+    def can_place(self, row, col, num):
+        """Check if num is free in the row, column and box of (row, col)"""
+        return not self.used(row, col) & (1 << (num - 1))
+    
+    def used(self, row, col):
+        """Mask of digits already present in the units of (row, col)"""
+        return self.rows[row] | self.cols[col] | self.boxes[self.geometry.box_index[row][col]]
+    
+    def place(self, row, col, num):
+        """Place num at (row, col) and mark it in all three units"""
+        bit = 1 << (num - 1)
+        self.grid[row][col] = num
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[self.geometry.box_index[row][col]] |= bit
+    
+    def unplace(self, row, col):
+        """Remove the digit at (row, col) and free it in all three units"""
+        bit = ~(1 << (self.grid[row][col] - 1))
+        self.grid[row][col] = 0
+        self.rows[row] &= bit
+        self.cols[col] &= bit
+        self.boxes[self.geometry.box_index[row][col]] &= bit
+    
+    def to_list(self):
+        """Return a copy of the grid as a list of lists"""
+        return [row[:] for row in self.grid]
+
+
+class GenerationCancelled(Exception):
+    """Raised when a puzzle generation request is cancelled"""
+
+
+class SearchBudgetExceeded(Exception):
+    """Raised when one solver search visits more than its node_limit"""
+
+
+class BacktrackSolver:
+    """Backtracking with fewest-candidates branching and singles propagation"""
+    
+    name = "backtrack"
+    
+    def __init__(self, node_limit=None):
+        # Running totals since creation: top-level searches, nodes visited
+        # and guesses that led nowhere
+        self.searches = 0
+        self.nodes = 0
+        self.backtracks = 0
+        # Nodes one search may visit before SearchBudgetExceeded; None is no limit
+        self.node_limit = node_limit
+        self._stop = None
+    
+    def _begin(self):
+        """Count a top-level search and arm its node budget"""
+        self.searches += 1
+        self._stop = None if self.node_limit is None else self.nodes + self.node_limit
+    
+    def count_solutions(self, board, limit=2):
+        """Count solutions of board, stopping once limit is reached"""
+        self._begin()
+        return self._search(ConstraintBoard(board), limit, None)
+    
+    def solve(self, board):
+        """Return a solved copy of board, or None if it has no solution"""
+        self._begin()
+        found = []
+        self._search(ConstraintBoard(board), 1, found)
+        return found[0] if found else None
+    
+    def fill(self, constraints, shuffle=None):
+        """Complete constraints in place, trying digits in shuffled order"""
+        self._begin()
+        found = []
+        if not self._search(constraints, 1, found, shuffle):
+            return False
+        constraints.load(found[0])
+        return True
+    
+    def has_other_solution(self, constraints, row, col, value):
+        """Check if empty (row, col) can hold anything but value in a solution"""
+        # One search whose root branches on (row, col) with value masked out
+        self._begin()
+        candidates = constraints.candidates(row, col) & ~(1 << (value - 1))
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            constraints.place(row, col, bit.bit_length())
+            try:
+                count = self._search(constraints, 1, None)
+            finally:
+                constraints.unplace(row, col)
+            if count:
+                return True
+            self.backtracks += 1
+        return False
+    
+    def _search(self, constraints, limit, found, shuffle=None):
+        """Count up to limit solutions, keeping the first one in found"""
+        self.nodes += 1
+        if self._stop is not None and self.nodes > self._stop:
+            raise SearchBudgetExceeded()
+        trail = []
+        if not self._propagate(constraints, trail):
+            self._undo(constraints, trail)
+            return 0
+        
+        # Branch on the empty cell with the fewest candidates
+        grid = constraints.grid
+        size = constraints.geometry.size
+        best = None
+        best_count = size + 1
+        for row in range(size):
+            for col in range(size):
+                if grid[row][col] == 0:
+                    n = bin(constraints.candidates(row, col)).count("1")
+                    if n < best_count:
+                        best = (row, col)
+                        best_count = n
+        
+        if best is None:
+            if found is not None and not found:
+                found.append(constraints.to_list())
+            self._undo(constraints, trail)
+            return 1
+        
+        row, col = best
+        candidates = constraints.candidates(row, col)
+        digits = [d for d in range(1, size + 1) if candidates & (1 << (d - 1))]
+        if shuffle:
+            shuffle(digits)
+        
+        count = 0
+        try:
+            for num in digits:
+                constraints.place(row, col, num)
+                solutions = self._search(constraints, limit - count, found, shuffle)
+                constraints.unplace(row, col)
+                if not solutions:
+                    self.backtracks += 1
+                count += solutions
+                if count >= limit:
+                    break
+        except SearchBudgetExceeded:
+            # Hand constraints back as they were found
+            if grid[row][col]:
+                constraints.unplace(row, col)
+            self._undo(constraints, trail)
+            raise
+        
+        self._undo(constraints, trail)
+        return count
+    
+    def _propagate(self, constraints, trail):
+        """Place naked and hidden singles until none are left"""
+        grid = constraints.grid
+        geometry = constraints.geometry
+        size = geometry.size
+        changed = True
+        while changed:
+            changed = False
+            
+            # Naked singles: a cell with exactly one candidate
+            for row in range(size):
+                for col in range(size):
+                    if grid[row][col] == 0:
+                        candidates = constraints.candidates(row, col)
+                        if not candidates:
+                            return False
+                        if candidates & (candidates - 1) == 0:
+                            constraints.place(row, col, candidates.bit_length())
+                            trail.append((row, col))
+                            changed = True
+            
+            # Hidden singles: a digit with exactly one place in a unit
+            for unit in geometry.units:
+                once = twice = placed = 0
+                for row, col in unit:
+                    if grid[row][col]:
+                        placed |= 1 << (grid[row][col] - 1)
+                    else:
+                        candidates = constraints.candidates(row, col)
+                        twice |= once & candidates
+                        once |= candidates
+                if (once | placed) != geometry.all_digits:
+                    return False
+                hidden = once & ~twice & ~placed
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for row, col in unit:
+                        if grid[row][col] == 0 and constraints.candidates(row, col) & bit:
+                            constraints.place(row, col, bit.bit_length())
+                            trail.append((row, col))
+                            changed = True
+                            break
+                    else:
+                        return False
+        return True
+    
+    def _undo(self, constraints, trail):
+        """Take back every placement recorded in trail"""
+        while trail:
+            row, col = trail.pop()
+            constraints.unplace(row, col)
+
+
+class CoverMatrix:
+    """Dancing links for what is left to cover on a ConstraintBoard
+    
+    Columns are the constraints not yet met (a cell, or a digit in a row,
+    column or box) and rows are the choices still open to empty cells.
+    sync() follows a board that changed in a few cells by opening and
+    closing only what those cells touch, so the uniqueness checks of one
+    removal loop share a single matrix.
+    """
+    
+    # More changed cells than this, or a matrix grown this many times past
+    # its last build, and sync() rebuilds instead
+    MAX_CHANGES = 4
+    MAX_GROWTH = 4
+    
+    def __init__(self, constraints):
+        self.constraints = constraints
+        self.geometry = constraints.geometry
+        self.build()
+    
+    def build(self):
+        """Link the matrix from scratch"""
+        geometry = self.geometry
+        n = geometry.size
+        area = n * n
+        constraints = self.constraints
+        self.grid = constraints.to_list()
+        # Node 0 is the root; every column header and choice row node is an
+        # index into these lists
+        self.left = [0]
+        self.right = [0]
+        self.up = [0]
+        self.down = [0]
+        self.column = [0]
+        self.size = [0]
+        self.row_of = [-1]
+        # Column header per constraint, 0 when it is met; first node per choice
+        self.header = [0] * (4 * area)
+        self.choices = {}
+        
+        for cell in range(area):
+            if self.grid[cell // n][cell % n] == 0:
+                self._add_column(cell)
+        for base, masks in ((area, constraints.rows), (2 * area, constraints.cols),
+                            (3 * area, constraints.boxes)):
+            for unit, mask in enumerate(masks):
+                for d in range(n):
+                    if not mask >> d & 1:
+                        self._add_column(base + unit * n + d)
+        for row in range(n):
+            for col in range(n):
+                if self.grid[row][col] == 0:
+                    cell = row * n + col
+                    for d in range(n):
+                        if self._free(row, col, d):
+                            self._add_choice(cell * n + d)
+        self.built_size = len(self.column)
+    
+    def sync(self):
+        """Catch up with the board's placements and removals since the last call"""
+        grid = self.constraints.grid
+        old = self.grid
+        n = self.geometry.size
+        changed = [(row, col) for row in range(n) if grid[row] != old[row]
+                   for col in range(n) if grid[row][col] != old[row][col]]
+        if not changed:
+            return
+        if (len(changed) > self.MAX_CHANGES or
+                len(self.column) > self.MAX_GROWTH * self.built_size):
+            self.build()
+            return
+        for row, col in changed:
+            if old[row][col] and not self._open(row, col, old[row][col]):
+                self.build()
+                return
+            if grid[row][col] and not self._close(row, col, grid[row][col]):
+                self.build()
+                return
+    
+    def _keys(self, row, col, d):
+        """Row-, column- and box-digit constraint keys of digit d + 1 at (row, col)"""
+        n = self.geometry.size
+        area = n * n
+        return (area + row * n + d, 2 * area + col * n + d,
+                3 * area + self.geometry.box_index[row][col] * n + d)
+    
+    def _free(self, row, col, d):
+        """Check if digit d + 1 is still unmet in all three units of (row, col)"""
+        header = self.header
+        row_key, col_key, box_key = self._keys(row, col, d)
+        return header[row_key] and header[col_key] and header[box_key]
+    
+    def _open(self, row, col, value):
+        """Take the clue value off (row, col); False if the matrix disagrees"""
+        n = self.geometry.size
+        cell = row * n + col
+        d = value - 1
+        keys = (cell,) + self._keys(row, col, d)
+        if any(self.header[key] for key in keys):
+            return False
+        for key in keys:
+            self._add_column(key)
+        self.grid[row][col] = 0
+        for digit in range(n):
+            if self._free(row, col, digit):
+                self._add_choice(cell * n + digit)
+        # Empty peers may take value again
+        for peer_row, peer_col in self.geometry.peers[row][col]:
+            cand = (peer_row * n + peer_col) * n + d
+            if (self.grid[peer_row][peer_col] == 0 and cand not in self.choices
+                    and self._free(peer_row, peer_col, d)):
+                self._add_choice(cand)
+        return True
+    
+    def _close(self, row, col, value):
+        """Put the clue value on (row, col); False if the matrix disagrees"""
+        n = self.geometry.size
+        cell = row * n + col
+        d = value - 1
+        if self.grid[row][col] or cell * n + d not in self.choices:
+            return False
+        for digit in range(n):
+            if cell * n + digit in self.choices:
+                self._remove_choice(cell * n + digit)
+        for peer_row, peer_col in self.geometry.peers[row][col]:
+            cand = (peer_row * n + peer_col) * n + d
+            if cand in self.choices:
+                self._remove_choice(cand)
+        for key in (cell,) + self._keys(row, col, d):
+            self._remove_column(key)
+        self.grid[row][col] = value
+        return True
+    
+    def _add_column(self, key):
+        """Append a header for constraint key at the end of the header ring"""
+        node = len(self.column)
+        self.column.append(node)
+        self.row_of.append(-1)
+        self.size.append(0)
+        self.up.append(node)
+        self.down.append(node)
+        self.left.append(self.left[0])
+        self.right.append(0)
+        self.right[self.left[0]] = node
+        self.left[0] = node
+        self.header[key] = node
+    
+    def _remove_column(self, key):
+        """Take an emptied constraint's header out of the header ring"""
+        c = self.header[key]
+        self.header[key] = 0
+        self.right[self.left[c]] = self.right[c]
+        self.left[self.right[c]] = self.left[c]
+    
+    def _add_choice(self, cand):
+        """Append the four nodes of a choice, each at the bottom of its column"""
+        n = self.geometry.size
+        cell, d = divmod(cand, n)
+        row, col = divmod(cell, n)
+        header = self.header
+        row_key, col_key, box_key = self._keys(row, col, d)
+        headers = (header[cell], header[row_key], header[col_key], header[box_key])
+        up, down, size = self.up, self.down, self.size
+        first = len(self.column)
+        self.column += headers
+        self.row_of += (cand, cand, cand, cand)
+        self.left += (first + 3, first, first + 1, first + 2)
+        self.right += (first + 1, first + 2, first + 3, first)
+        self.size += (0, 0, 0, 0)
+        for i, c in enumerate(headers):
+            up.append(up[c])
+            down.append(c)
+            down[up[c]] = first + i
+            up[c] = first + i
+            size[c] += 1
+        self.choices[cand] = first
+    
+    def _remove_choice(self, cand):
+        """Unlink a choice's nodes from their columns"""
+        first = self.choices.pop(cand)
+        up, down, size, column = self.up, self.down, self.size, self.column
+        for j in range(first, first + 4):
+            down[up[j]] = down[j]
+            up[down[j]] = up[j]
+            size[column[j]] -= 1
+
+
+class DLXSolver:
+    """Knuth's Algorithm X on dancing links for Sudoku exact cover"""
+    
+    name = "dlx"
+    
+    def __init__(self, node_limit=None):
+        # Running totals since creation: top-level searches, nodes visited
+        # and guesses that led nowhere
+        self.searches = 0
+        self.nodes = 0
+        self.backtracks = 0
+        # Nodes one search may visit before SearchBudgetExceeded; None is no limit
+        self.node_limit = node_limit
+        # Matrix kept in step with the board has_other_solution last saw
+        self._matrix = None
+    
+    def count_solutions(self, board, limit=2):
+        """Count solutions of board, stopping once limit is reached"""
+        constraints = self._load(board)
+        if constraints is None:
+            return 0
+        count, _ = self._run(CoverMatrix(constraints), limit)
+        return count
+    
+    def solve(self, board):
+        """Return a solved copy of board, or None if it has no solution"""
+        constraints = self._load(board)
+        if constraints is None:
+            return None
+        count, found = self._run(CoverMatrix(constraints), 1, keep_solution=True)
+        if not count:
+            return None
+        n = constraints.geometry.size
+        solution = constraints.to_list()
+        for cand in found:
+            solution[cand // (n * n)][cand // n % n] = cand % n + 1
+        return solution
+    
+    def has_other_solution(self, constraints, row, col, value):
+        """Check if empty (row, col) can hold anything but value in a solution"""
+        # One search over the shared matrix, without the choice of value there
+        matrix = self._matrix
+        if matrix is None or matrix.constraints is not constraints:
+            matrix = self._matrix = CoverMatrix(constraints)
+        else:
+            matrix.sync()
+        n = constraints.geometry.size
+        exclude = matrix.choices.get((row * n + col) * n + value - 1)
+        try:
+            count, _ = self._run(matrix, 1, exclude=exclude)
+        except SearchBudgetExceeded:
+            # An interrupted search leaves columns covered
+            self._matrix = None
+            raise
+        return count > 0
+    
+    @staticmethod
+    def _load(board):
+        """ConstraintBoard for board, or None if two givens clash"""
+        constraints = ConstraintBoard(geometry=Geometry.of(len(board)))
+        for row, values in enumerate(board):
+            for col, num in enumerate(values):
+                if num:
+                    if not constraints.can_place(row, col, num):
+                        return None
+                    constraints.place(row, col, num)
+        return constraints
+    
+    def _run(self, matrix, limit, keep_solution=False, exclude=None):
+        """Search matrix for up to limit solutions, leaving it as it was found"""
+        self.searches += 1
+        left, right, up, down = matrix.left, matrix.right, matrix.up, matrix.down
+        column, size, row_of = matrix.column, matrix.size, matrix.row_of
+        
+        def cover(c):
+            right[left[c]] = right[c]
+            left[right[c]] = left[c]
+            i = down[c]
+            while i != c:
+                j = right[i]
+                while j != i:
+                    down[up[j]] = down[j]
+                    up[down[j]] = up[j]
+                    size[column[j]] -= 1
+                    j = right[j]
+                i = down[i]
+        
+        def uncover(c):
+            i = up[c]
+            while i != c:
+                j = left[i]
+                while j != i:
+                    size[column[j]] += 1
+                    down[up[j]] = j
+                    up[down[j]] = j
+                    j = left[j]
+                i = up[i]
+            right[left[c]] = c
+            left[right[c]] = c
+        
+        chosen = []
+        found = []
+        count = 0
+        nodes = 0
+        backtracks = 0
+        node_limit = self.node_limit
+        
+        def search():
+            nonlocal count, nodes, backtracks
+            nodes += 1
+            if node_limit is not None and nodes > node_limit:
+                raise SearchBudgetExceeded()
+            if right[0] == 0:
+                count += 1
+                if keep_solution and not found:
+                    found.extend(chosen)
+                return
+            
+            # Branch on the column with the fewest remaining rows
+            best = right[0]
+            best_size = size[best]
+            c = right[best]
+            while c != 0 and best_size > 1:
+                if size[c] < best_size:
+                    best = c
+                    best_size = size[c]
+                c = right[c]
+            if best_size == 0:
+                return
+            
+            cover(best)
+            r = down[best]
+            while r != best:
+                chosen.append(row_of[r])
+                j = right[r]
+                while j != r:
+                    cover(column[j])
+                    j = right[j]
+                before = count
+                search()
+                if count == before:
+                    backtracks += 1
+                j = left[r]
+                while j != r:
+                    uncover(column[j])
+                    j = left[j]
+                chosen.pop()
+                if count >= limit:
+                    break
+                r = down[r]
+            uncover(best)
+        
+        # An excluded choice is unlinked from its columns for this search only
+        if exclude is not None:
+            for j in range(exclude, exclude + 4):
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+        try:
+            search()
+        finally:
+            self.nodes += nodes
+            self.backtracks += backtracks
+        if exclude is not None:
+            for j in range(exclude + 3, exclude - 1, -1):
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+        return count, found
+
+
+SOLVERS = {
+    BacktrackSolver.name: BacktrackSolver,
+    DLXSolver.name: DLXSolver
+}
+
+
+SolveStep = namedtuple(
+    "SolveStep", ["technique", "level", "cells", "eliminations", "placement"]
+)
+
+
+class LogicalSolver:
+    """Step-by-step solver using human techniques, for grading puzzles"""
+    
+    # Rating of a puzzle that cannot be finished without guessing
+    GUESS_LEVEL = 6
+    
+    def __init__(self, board, candidates=None):
+        self.geometry = geometry = Geometry.of(len(board))
+        size = geometry.size
+        self.grid = [v for row in board for v in row]
+        self.cand = [0] * geometry.cells
+        for i in range(geometry.cells):
+            if not self.grid[i]:
+                used = 0
+                for peer in geometry.peer_index[i]:
+                    if self.grid[peer]:
+                        used |= 1 << (self.grid[peer] - 1)
+                self.cand[i] = ~used & geometry.all_digits
+                # Optional per-cell masks narrow candidates, e.g. player notes
+                if candidates is not None:
+                    self.cand[i] &= candidates[i // size][i % size]
+        
+        # Easiest first; find_step returns the first technique that applies
+        self.techniques = [
+            (1, self._hidden_single),
+            (1, self._naked_single),
+            (2, self._pointing),
+            (2, self._box_line),
+            (3, lambda: self._naked_subset(2, "Naked Pair")),
+            (3, lambda: self._hidden_subset(2, "Hidden Pair")),
+            (3, lambda: self._naked_subset(3, "Naked Triple")),
+            (3, lambda: self._hidden_subset(3, "Hidden Triple")),
+            (4, lambda: self._fish(2, "X-Wing")),
+            (4, self._xy_wing),
+            (5, lambda: self._fish(3, "Swordfish")),
+            (5, self._simple_coloring)
+        ]
+    
+    def solved(self):
+        """Check if every cell has been filled"""
+        return all(self.grid)
+    
+    def find_step(self, max_level=None):
+        """Return the easiest applicable step up to max_level, or None"""
+        for level, technique in self.techniques:
+            if max_level is not None and level > max_level:
+                return None
+            step = technique()
+            if step is not None:
+                return step
+        return None
+    
+    def apply(self, step):
+        """Apply a step's eliminations and placement"""
+        size = self.geometry.size
+        for row, col, num in step.eliminations:
+            self.cand[row * size + col] &= ~(1 << (num - 1))
+        if step.placement is not None:
+            row, col, num = step.placement
+            i = row * size + col
+            bit = 1 << (num - 1)
+            self.grid[i] = num
+            self.cand[i] = 0
+            for peer in self.geometry.peer_index[i]:
+                self.cand[peer] &= ~bit
+    
+    def steps(self, max_level=None):
+        """Yield and apply steps until solved or stuck"""
+        while not self.solved():
+            step = self.find_step(max_level)
+            if step is None:
+                return
+            self.apply(step)
+            yield step
+    
+    def rate(self, max_level=None):
+        """Hardest technique level needed to solve, stopping above max_level"""
+        level = 0
+        for step in self.steps(max_level):
+            level = max(level, step.level)
+        if self.solved():
+            return level
+        if max_level is None:
+            return self.GUESS_LEVEL
+        return min(max_level + 1, self.GUESS_LEVEL)
+    
+    @staticmethod
+    def describe(step):
+        """One-line, human readable explanation of a step"""
+        text = step.technique
+        if step.cells:
+            text += " in " + ", ".join(f"r{r + 1}c{c + 1}" for r, c in step.cells)
+        if step.placement is not None:
+            row, col, num = step.placement
+            text += f": place {num} at r{row + 1}c{col + 1}"
+        if step.eliminations:
+            text += ": remove " + ", ".join(
+                f"{num} from r{row + 1}c{col + 1}" for row, col, num in step.eliminations
+            )
+        return text
+    
+    def _step(self, technique, level, cells, eliminations=(), placement=None):
+        """Build a SolveStep from flat cell indexes"""
+        size = self.geometry.size
+        return SolveStep(
+            technique,
+            level,
+            [divmod(i, size) for i in cells],
+            [divmod(i, size) + (d + 1,) for i, d in eliminations],
+            None if placement is None else divmod(placement[0], size) + (placement[1],)
+        )
+    
+    def _eliminate_from(self, cells, mask):
+        """(cell, digit) pairs for each digit of mask still open in cells"""
+        found = []
+        for i in cells:
+            hit = self.cand[i] & mask
+            while hit:
+                bit = hit & -hit
+                hit ^= bit
+                found.append((i, bit.bit_length() - 1))
+        return found
+    
+    def _hidden_single(self):
+        cand = self.cand
+        for unit in self.geometry.unit_index:
+            once = twice = 0
+            for i in unit:
+                twice |= once & cand[i]
+                once |= cand[i]
+            single = once & ~twice
+            if single:
+                bit = single & -single
+                for i in unit:
+                    if cand[i] & bit:
+                        return self._step("Hidden Single", 1, [i], placement=(i, bit.bit_length()))
+        return None
+    
+    def _naked_single(self):
+        cand = self.cand
+        for i in range(self.geometry.cells):
+            m = cand[i]
+            if m and not m & (m - 1):
+                return self._step("Naked Single", 1, [i], placement=(i, m.bit_length()))
+        return None
+    
+    def _pointing(self):
+        # A digit confined to one row or column of a box leaves the rest of that line
+        cand = self.cand
+        size = self.geometry.size
+        units = self.geometry.unit_index
+        for box in range(size):
+            for d in range(size):
+                bit = 1 << d
+                cells = [i for i in units[2 * size + box] if cand[i] & bit]
+                if len(cells) < 2:
+                    continue
+                for line in ({i // size for i in cells}, {size + i % size for i in cells}):
+                    if len(line) == 1:
+                        others = [i for i in units[line.pop()] if i not in cells]
+                        eliminations = self._eliminate_from(others, bit)
+                        if eliminations:
+                            return self._step("Pointing", 2, cells, eliminations)
+        return None
+    
+    def _box_line(self):
+        # A digit confined to one box within a line leaves the rest of that box
+        cand = self.cand
+        size = self.geometry.size
+        units = self.geometry.unit_index
+        box_index = self.geometry.box_index
+        for line in range(2 * size):
+            for d in range(size):
+                bit = 1 << d
+                cells = [i for i in units[line] if cand[i] & bit]
+                if len(cells) < 2:
+                    continue
+                boxes = {box_index[i // size][i % size] for i in cells}
+                if len(boxes) == 1:
+                    others = [i for i in units[2 * size + boxes.pop()] if i not in cells]
+                    eliminations = self._eliminate_from(others, bit)
+                    if eliminations:
+                        return self._step("Box/Line Reduction", 2, cells, eliminations)
+        return None
+    
+    def _naked_subset(self, size, name):
+        # size cells of a unit sharing exactly size candidates
+        cand = self.cand
+        for unit in self.geometry.unit_index:
+            cells = [i for i in unit if 2 <= bin(cand[i]).count("1") <= size]
+            for combo in combinations(cells, size):
+                union = 0
+                for i in combo:
+                    union |= cand[i]
+                if bin(union).count("1") == size:
+                    others = [i for i in unit if i not in combo]
+                    eliminations = self._eliminate_from(others, union)
+                    if eliminations:
+                        return self._step(name, 3, combo, eliminations)
+        return None
+    
+    def _hidden_subset(self, size, name):
+        # size digits of a unit confined to the same size cells
+        cand = self.cand
+        for unit in self.geometry.unit_index:
+            places = {}
+            for d in range(self.geometry.size):
+                cells = [i for i in unit if cand[i] & (1 << d)]
+                if 2 <= len(cells) <= size:
+                    places[d] = cells
+            for digits in combinations(places, size):
+                cells = set()
+                for d in digits:
+                    cells.update(places[d])
+                if len(cells) == size:
+                    keep = sum(1 << d for d in digits)
+                    eliminations = self._eliminate_from(sorted(cells),
+                                                         self.geometry.all_digits & ~keep)
+                    if eliminations:
+                        return self._step(name, 3, sorted(cells), eliminations)
+        return None
+    
+    def _fish(self, size, name):
+        # size base lines whose candidates for a digit share size cover lines
+        cand = self.cand
+        n = self.geometry.size
+        level = 4 if size == 2 else 5
+        for d in range(n):
+            bit = 1 << d
+            for by_row in (True, False):
+                lines = []
+                for line in range(n):
+                    unit = self.geometry.unit_index[line if by_row else n + line]
+                    cross = [k for k, i in enumerate(unit) if cand[i] & bit]
+                    if 2 <= len(cross) <= size:
+                        lines.append((line, cross))
+                for combo in combinations(lines, size):
+                    cover = set()
+                    for _, cross in combo:
+                        cover.update(cross)
+                    if len(cover) != size:
+                        continue
+                    base = {line for line, _ in combo}
+                    others = []
+                    for k in cover:
+                        for line in range(n):
+                            if line not in base:
+                                others.append(line * n + k if by_row else k * n + line)
+                    eliminations = self._eliminate_from(others, bit)
+                    if eliminations:
+                        cells = [line * n + k if by_row else k * n + line
+                                 for line, cross in combo for k in cross]
+                        return self._step(name, level, cells, eliminations)
+        return None
+    
+    def _xy_wing(self):
+        # Pivot XY with wings XZ and YZ: cells seeing both wings cannot be Z
+        cand = self.cand
+        peer_index = self.geometry.peer_index
+        bivalue = [i for i in range(self.geometry.cells) if bin(cand[i]).count("1") == 2]
+        for pivot in bivalue:
+            pm = cand[pivot]
+            wings = [i for i in bivalue if i in peer_index[pivot]
+                     and bin(cand[i] & pm).count("1") == 1]
+            for a, b in combinations(wings, 2):
+                z = cand[a] & ~pm
+                if z != cand[b] & ~pm or cand[a] & pm == cand[b] & pm:
+                    continue
+                others = [i for i in peer_index[a] & peer_index[b] if i != pivot]
+                eliminations = self._eliminate_from(others, z)
+                if eliminations:
+                    return self._step("XY-Wing", 4, [pivot, a, b], eliminations)
+        return None
+    
+    def _simple_coloring(self):
+        # Two-colour chains of conjugate pairs for one digit
+        cand = self.cand
+        peer_index = self.geometry.peer_index
+        for d in range(self.geometry.size):
+            bit = 1 << d
+            links = {}
+            for unit in self.geometry.unit_index:
+                cells = [i for i in unit if cand[i] & bit]
+                if len(cells) == 2:
+                    links.setdefault(cells[0], []).append(cells[1])
+                    links.setdefault(cells[1], []).append(cells[0])
+            
+            colour = {}
+            for start in links:
+                if start in colour:
+                    continue
+                groups = ([], [])
+                colour[start] = 0
+                stack = [start]
+                while stack:
+                    i = stack.pop()
+                    groups[colour[i]].append(i)
+                    for j in links[i]:
+                        if j not in colour:
+                            colour[j] = 1 - colour[i]
+                            stack.append(j)
+                if len(groups[0]) + len(groups[1]) < 4:
+                    continue
+                chain = groups[0] + groups[1]
+                
+                # Two cells of one colour see each other: that colour is false
+                for group in groups:
+                    if any(b in peer_index[a] for a, b in combinations(group, 2)):
+                        return self._step("Simple Coloring", 5, chain,
+                                          self._eliminate_from(group, bit))
+                
+                # A cell seeing both colours cannot hold the digit
+                others = [i for i in range(self.geometry.cells)
+                          if cand[i] & bit and i not in colour
+                          and peer_index[i].intersection(groups[0])
+                          and peer_index[i].intersection(groups[1])]
+                eliminations = self._eliminate_from(others, bit)
+                if eliminations:
+                    return self._step("Simple Coloring", 5, chain, eliminations)
+        return None
+
+
+class RecordLayout:
+    """Bit positions of a packed move record for one board size"""
+    
+    # Fields, low to high: kind 3, linked 1, cell, old, new, old notes, new
+    # notes. On 9x9 that is cell 7, values 4 and notes 9 bits each.
+    _cache = {}
+    
+    def __init__(self, size):
+        self.cell_mask = (1 << (size * size - 1).bit_length()) - 1
+        self.value_mask = (1 << size.bit_length()) - 1
+        self.notes_mask = (1 << size) - 1
+        self.old_shift = 4 + self.cell_mask.bit_length()
+        self.new_shift = self.old_shift + self.value_mask.bit_length()
+        self.old_notes_shift = self.new_shift + self.value_mask.bit_length()
+        self.new_notes_shift = self.old_notes_shift + size
+        # EventLog flags mistakes just above the move fields
+        self.mistake = 1 << (self.new_notes_shift + size)
+        # Records that outgrow 64 bits are kept in a list of Python ints
+        self.typecode = 'Q' if self.mistake < 1 << 64 else None
+    
+    @classmethod
+    def of(cls, size):
+        """Shared layout for a board with the given side"""
+        layout = cls._cache.get(size)
+        if layout is None:
+            layout = cls._cache[size] = cls(size)
+        return layout
+    
+    def new_records(self, records=()):
+        """Storage for packed records, filled from records"""
+        if self.typecode is None:
+            return list(records)
+        return array(self.typecode, records)
+    
+    def pack(self, kind, linked, cell, old, new, old_notes, new_notes):
+        """Pack one move into an integer"""
+        return (kind | linked << 3 | cell << 4 | old << self.old_shift |
+                new << self.new_shift | old_notes << self.old_notes_shift |
+                new_notes << self.new_notes_shift)
+    
+    def unpack(self, record):
+        """Unpack a record into (kind, linked, cell, old, new, old_notes, new_notes)"""
+        return (
+            record & 0x7,
+            record >> 3 & 1,
+            record >> 4 & self.cell_mask,
+            record >> self.old_shift & self.value_mask,
+            record >> self.new_shift & self.value_mask,
+            record >> self.old_notes_shift & self.notes_mask,
+            record >> self.new_notes_shift & self.notes_mask
+        )
+
+
+class MoveHistory:
+    """Undo/redo log of moves, each packed into one integer"""
+    
+    # Record kinds; UNDO, REDO and SOLVE only appear in the event log
+    PLACE, CLEAR, NOTE, HINT, UNDO, REDO, SOLVE = range(7)
+    
+    # Records follow RecordLayout; on 9x9 each fits in 64 bits.
+    # A linked record is undone with the one before.
+    
+    def __init__(self, records=(), cursor=None, size=9):
+        self.layout = RecordLayout.of(size)
+        self.records = self.layout.new_records(records)
+        self.cursor = len(self.records) if cursor is None else cursor
+    
+    def pack(self, kind, linked, cell, old, new, old_notes, new_notes):
+        """Pack one move into an integer"""
+        return self.layout.pack(kind, linked, cell, old, new, old_notes, new_notes)
+    
+    def unpack(self, record):
+        """Unpack a record into (kind, linked, cell, old, new, old_notes, new_notes)"""
+        return self.layout.unpack(record)
+    
+    def record(self, kind, linked, cell, old, new, old_notes, new_notes):
+        """Append a move, dropping anything that could have been redone"""
+        if self.cursor < len(self.records):
+            del self.records[self.cursor:]
+        self.records.append(self.pack(kind, linked, cell, old, new, old_notes, new_notes))
+        self.cursor += 1
+    
+    def can_undo(self):
+        return self.cursor > 0
+    
+    def can_redo(self):
+        return self.cursor < len(self.records)
+    
+    def undo(self):
+        """Step back over one record and return it unpacked, or None"""
+        if not self.can_undo():
+            return None
+        self.cursor -= 1
+        return self.unpack(self.records[self.cursor])
+    
+    def redo(self):
+        """Step forward over one record and return it unpacked, or None"""
+        if not self.can_redo():
+            return None
+        self.cursor += 1
+        return self.unpack(self.records[self.cursor - 1])
+    
+    def next_linked(self):
+        """Check if the record redo would return next is linked"""
+        return self.can_redo() and bool(self.records[self.cursor] >> 3 & 1)
+
+
+class EventLog:
+    """Append-only, timestamped log of every change a player makes"""
+    
+    # Records use the MoveHistory layout plus a flag for moves that were
+    # mistakes, at RecordLayout.mistake
+    def __init__(self, records=(), times=(), size=9):
+        self.layout = RecordLayout.of(size)
+        self.records = self.layout.new_records(records)
+        self.times = array('I', times)
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def append(self, ms, kind, linked, cell, old, new, old_notes, new_notes, mistake=False):
+        """Log one cell change, ms milliseconds into the game"""
+        record = self.layout.pack(kind, linked, cell, old, new, old_notes, new_notes)
+        self.records.append(record | self.layout.mistake if mistake else record)
+        self.times.append(ms)
+    
+    def __iter__(self):
+        """Yield (ms, kind, linked, cell, old, new, old_notes, new_notes, mistake)"""
+        mistake = self.layout.mistake
+        for ms, record in zip(self.times, self.records):
+            yield (ms,) + self.layout.unpack(record) + (bool(record & mistake),)
+
+
+class GameReplay:
+    """Rebuilds any point of a game from its initial board and event log"""
+    
+    # A snapshot of board, notes and counters is kept every this many events
+    CHECKPOINT_EVERY = 64
+    
+    def __init__(self, initial_board, events, times=None):
+        self.size = len(initial_board)
+        self.layout = RecordLayout.of(self.size)
+        # Note masks need more than 16 bits on 25x25
+        self.notes_type = 'H' if self.size <= 16 else 'L'
+        self.initial_board = array('B', (v for row in initial_board for v in row))
+        self.records = self.layout.new_records(events)
+        self.times = array('I', times if times is not None else [0] * len(self.records))
+        self.checkpoints = None
+    
+    def __len__(self):
+        return len(self.records)
+    
+    @classmethod
+    def from_state(cls, game_state):
+        """Create a replay from a save_game state dict"""
+        return cls(game_state['initial_board'], game_state.get('events', ()),
+                   game_state.get('event_times'))
+    
+    @classmethod
+    def load(cls, filename):
+        """Create a replay from a JSON or binary save file"""
+        with open(filename, 'rb') as f:
+            data = f.read()
+        if data.startswith(PuzzleCodec.MAGIC):
+            return cls.from_state(PuzzleCodec.unpack_game(data))
+        return cls.from_state(json.loads(data))
+    
+    @classmethod
+    def stream(cls, filenames):
+        """Yield (filename, replay) for each save, holding one at a time"""
+        for filename in filenames:
+            yield filename, cls.load(filename)
+    
+    def frames(self, start=0):
+        """Yield (index, ms, board, notes, hints, mistakes) after each event
+        
+        board and notes are flat arrays of every cell, updated in place; copy
+        them to keep a frame.
+        """
+        board, notes, hints, mistakes = self._restore(start)
+        return self._advance(board, notes, hints, mistakes, start, len(self.records))
+    
+    def state_at(self, index):
+        """Game state after the first index events, as a save_game style dict"""
+        index = max(0, min(index, len(self.records)))
+        board, notes, hints, mistakes = self._restore(index)
+        size = self.size
+        return {
+            'board': [list(board[r * size:r * size + size]) for r in range(size)],
+            'notes': [list(notes[r * size:r * size + size]) for r in range(size)],
+            'hints_used': hints,
+            'mistakes': mistakes,
+            'elapsed_time': self.times[index - 1] // 1000 if index else 0,
+            'event_index': index
+        }
+    
+    def state_at_time(self, seconds):
+        """Game state once every event up to the given second has happened"""
+        return self.state_at(bisect_right(self.times, int(seconds * 1000)))
+    
+    def _advance(self, board, notes, hints, mistakes, start, stop):
+        """Apply events start..stop as plain deltas, yielding after each one"""
+        records, times, layout = self.records, self.times, self.layout
+        for index in range(start, stop):
+            record = records[index]
+            cell = record >> 4 & layout.cell_mask
+            new = record >> layout.new_shift & layout.value_mask
+            if record & 0x7 == MoveHistory.HINT and new != board[cell]:
+                hints += 1
+            if record & layout.mistake:
+                mistakes += 1
+            board[cell] = new
+            notes[cell] = record >> layout.new_notes_shift & layout.notes_mask
+            yield index + 1, times[index], board, notes, hints, mistakes
+    
+    def _restore(self, index):
+        """Rebuild the state before event index from the nearest checkpoint"""
+        if self.checkpoints is None:
+            # One pass over the log, snapshotting every CHECKPOINT_EVERY events
+            notes_type = self.notes_type
+            state = (array('B', self.initial_board),
+                     array(notes_type, [0] * len(self.initial_board)), 0, 0)
+            self.checkpoints = [state]
+            for frame in self._advance(array('B', state[0]), array(notes_type, state[1]),
+                                       0, 0, 0, len(self.records)):
+                if frame[0] % self.CHECKPOINT_EVERY == 0:
+                    _, _, board, notes, hints, mistakes = frame
+                    self.checkpoints.append((array('B', board), array(notes_type, notes),
+                                             hints, mistakes))
+        
+        checkpoint = index // self.CHECKPOINT_EVERY
+        board, notes, hints, mistakes = self.checkpoints[checkpoint]
+        board, notes = array('B', board), array(self.notes_type, notes)
+        for _, _, _, _, hints, mistakes in self._advance(
+                board, notes, hints, mistakes, checkpoint * self.CHECKPOINT_EVERY, index):
+            pass
+        return board, notes, hints, mistakes
+
+
+class PuzzleCodec:
+    """Compact text and binary encodings for boards and game state"""
+    
+    # Binary game record: header, difficulty name, three packed boards, notes,
+    # then the move history (from version 2) and the event log (from version 3)
+    MAGIC = b"SDKB"
+    VERSION = 3
+    HEADER = struct.Struct("<4sBBBIHHd")
+    HISTORY_HEADER = struct.Struct("<II")
+    EVENTS_HEADER = struct.Struct("<I")
+    BOARD_BYTES = 41
+    NOTES_BYTES = 92
+    
+    @staticmethod
+    def board_to_line(board):
+        """Encode a board as one symbol per cell (81 on 9x9), '.' for empty cells"""
+        symbols = Geometry.SYMBOLS
+        return "".join(symbols[v - 1] if v else "." for row in board for v in row)
+    
+    @staticmethod
+    def line_to_board(line):
+        """Decode a line of 16, 81, 256 or 625 symbols; '.' and '0' are empty cells"""
+        line = line.strip()
+        size = round(len(line) ** 0.5)
+        if size * size != len(line) or size not in (4, 9, 16, 25):
+            raise ValueError(f"Expected 16, 81, 256 or 625 characters, got {len(line)}")
+        geometry = Geometry.of(size)
+        values = []
+        for ch in line:
+            value = 0 if ch in ".0" else geometry.value_of(ch)
+            if value == 0 and ch not in ".0":
+                raise ValueError(f"Invalid symbol for a {size}x{size} board: {ch!r}")
+            values.append(value)
+        return [values[r * size:r * size + size] for r in range(size)]
+    
+    @staticmethod
+    def pack_board(board):
+        """Pack a board into 41 bytes, two 4-bit cells per byte"""
+        values = [v for row in board for v in row] + [0]
+        return bytes((values[i] << 4) | values[i + 1] for i in range(0, 82, 2))
+    
+    @staticmethod
+    def unpack_board(data):
+        """Unpack a 41-byte board"""
+        values = []
+        for byte in data[:PuzzleCodec.BOARD_BYTES]:
+            values.append(byte >> 4)
+            values.append(byte & 0x0F)
+        return [values[r * 9:r * 9 + 9] for r in range(9)]
+    
+    @staticmethod
+    def pack_notes(notes):
+        """Pack 9x9 note masks into a 729-bit bitmap"""
+        bits = 0
+        for row in range(9):
+            for col in range(9):
+                bits |= notes[row][col] << ((row * 9 + col) * 9)
+        return bits.to_bytes(PuzzleCodec.NOTES_BYTES, "little")
+    
+    @staticmethod
+    def unpack_notes(data):
+        """Unpack a 729-bit bitmap into 9x9 note masks"""
+        bits = int.from_bytes(data[:PuzzleCodec.NOTES_BYTES], "little")
+        return [[bits >> ((r * 9 + c) * 9) & ALL_DIGITS for c in range(9)]
+                for r in range(9)]
+    
+    @staticmethod
+    def notes_to_flags(notes):
+        """Expand note masks into the 9x9x9 style flags used by JSON saves"""
+        size = len(notes)
+        return [[[bool(mask >> d & 1) for d in range(size)] for mask in row]
+                for row in notes]
+    
+    @staticmethod
+    def flags_to_notes(flags):
+        """Collapse 9x9x9 style note flags into note masks"""
+        return [[sum(1 << d for d, flag in enumerate(cell) if flag) for cell in row]
+                for row in flags]
+    
+    @staticmethod
+    def pack_game(state):
+        """Pack a save_game state dict into a binary record"""
+        if len(state['board']) != 9:
+            raise ValueError("Binary saves only hold 9x9 games")
+        name = state['difficulty'].encode("ascii")
+        history = MoveHistory(state.get('history', ()), state.get('history_cursor'))
+        events = EventLog(state.get('events', ()), state.get('event_times', ()))
+        timestamp = datetime.fromisoformat(state['timestamp']).timestamp()
+        header = PuzzleCodec.HEADER.pack(
+            PuzzleCodec.MAGIC,
+            PuzzleCodec.VERSION,
+            1 if state['game_active'] else 0,
+            len(name),
+            state['elapsed_time'],
+            state['hints_used'],
+            state['mistakes'],
+            timestamp
+        )
+        return b"".join([
+            header,
+            name,
+            PuzzleCodec.pack_board(state['board']),
+            PuzzleCodec.pack_board(state['initial_board']),
+            PuzzleCodec.pack_board(state['solution']),
+            PuzzleCodec.pack_notes(state['notes']),
+            PuzzleCodec.HISTORY_HEADER.pack(len(history.records), history.cursor),
+            history.records.tobytes(),
+            PuzzleCodec.EVENTS_HEADER.pack(len(events)),
+            events.records.tobytes(),
+            events.times.tobytes()
+        ])
+    
+    @staticmethod
+    def unpack_game(data):
+        """Unpack a binary record into a save_game state dict"""
+        header = PuzzleCodec.HEADER
+        magic, version, flags, name_len, elapsed, hints, mistakes, timestamp = \
+            header.unpack_from(data)
+        if magic != PuzzleCodec.MAGIC or not 1 <= version <= PuzzleCodec.VERSION:
+            raise ValueError("Not a binary Sudoku save")
+        
+        offset = header.size
+        difficulty = data[offset:offset + name_len].decode("ascii")
+        offset += name_len
+        boards = []
+        for _ in range(3):
+            boards.append(PuzzleCodec.unpack_board(data[offset:]))
+            offset += PuzzleCodec.BOARD_BYTES
+        notes = PuzzleCodec.unpack_notes(data[offset:])
+        offset += PuzzleCodec.NOTES_BYTES
+        
+        history = MoveHistory()
+        if version >= 2:
+            count, cursor = PuzzleCodec.HISTORY_HEADER.unpack_from(data, offset)
+            offset += PuzzleCodec.HISTORY_HEADER.size
+            history.records.frombytes(data[offset:offset + count * history.records.itemsize])
+            history.cursor = cursor
+            offset += count * history.records.itemsize
+        
+        events = EventLog()
+        if version >= 3:
+            count, = PuzzleCodec.EVENTS_HEADER.unpack_from(data, offset)
+            offset += PuzzleCodec.EVENTS_HEADER.size
+            events.records.frombytes(data[offset:offset + count * events.records.itemsize])
+            offset += count * events.records.itemsize
+            events.times.frombytes(data[offset:offset + count * events.times.itemsize])
+        
+        return {
+            'board': boards[0],
+            'initial_board': boards[1],
+            'solution': boards[2],
+            'difficulty': difficulty,
+            'elapsed_time': elapsed,
+            'hints_used': hints,
+            'mistakes': mistakes,
+            'game_active': bool(flags & 1),
+            'notes': notes,
+            'history': list(history.records),
+            'history_cursor': history.cursor,
+            'events': list(events.records),
+            'event_times': list(events.times),
+            'timestamp': datetime.fromtimestamp(timestamp).isoformat()
+        }
+
+
+class PuzzleBank:
+    """Fixed-width puzzle file read through mmap, indexed by difficulty"""
+    
+    # Header, one index entry per difficulty, then puzzle+solution records
+    MAGIC = b"SDBK"
+    VERSION = 1
+    HEADER = struct.Struct("<4sBBH")
+    ENTRY = struct.Struct("<8sQQ")
+    RECORD_BYTES = 2 * PuzzleCodec.BOARD_BYTES
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, entries, record_bytes = self.HEADER.unpack_from(self._map)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"Not a puzzle bank: {path}")
+        if record_bytes != self.RECORD_BYTES:
+            self.close()
+            raise ValueError(f"Unsupported record size: {record_bytes}")
+        
+        self.index = {}
+        offset = self.HEADER.size
+        for _ in range(entries):
+            name, first, count = self.ENTRY.unpack_from(self._map, offset)
+            self.index[name.rstrip(b"\0").decode("ascii")] = (first, count)
+            offset += self.ENTRY.size
+        self.data_offset = offset
+    
+    def __len__(self):
+        return sum(count for _, count in self.index.values())
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        """Release the mapping and the file"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def count(self, difficulty):
+        """Number of puzzles stored for a difficulty"""
+        return self.index.get(difficulty, (0, 0))[1]
+    
+    def get(self, difficulty, index):
+        """Return the (board, solution) pair at index within a difficulty"""
+        first, count = self.index.get(difficulty, (0, 0))
+        if not 0 <= index < count:
+            raise IndexError(f"No {difficulty} puzzle at index {index}")
+        start = self.data_offset + (first + index) * self.RECORD_BYTES
+        record = self._map[start:start + self.RECORD_BYTES]
+        return (
+            PuzzleCodec.unpack_board(record),
+            PuzzleCodec.unpack_board(record[PuzzleCodec.BOARD_BYTES:])
+        )
+    
+    def random(self, difficulty, rng=random):
+        """Return a random (board, solution) pair for a difficulty"""
+        count = self.count(difficulty)
+        if count == 0:
+            raise IndexError(f"No {difficulty} puzzles in bank")
+        return self.get(difficulty, rng.randrange(count))
+    
+    @classmethod
+    def write(cls, path, puzzles):
+        """Write (difficulty, board, solution) triples to a new bank file"""
+        spools = {}
+        counts = {}
+        try:
+            # Records are spooled per difficulty so memory stays flat
+            for difficulty, board, solution in puzzles:
+                if difficulty not in spools:
+                    if len(difficulty.encode("ascii")) > 8:
+                        raise ValueError(f"Difficulty name too long: {difficulty}")
+                    spools[difficulty] = tempfile.TemporaryFile()
+                    counts[difficulty] = 0
+                spools[difficulty].write(PuzzleCodec.pack_board(board))
+                spools[difficulty].write(PuzzleCodec.pack_board(solution))
+                counts[difficulty] += 1
+            
+            with open(path, 'wb') as f:
+                f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(spools), cls.RECORD_BYTES))
+                first = 0
+                for difficulty in spools:
+                    f.write(cls.ENTRY.pack(difficulty.encode("ascii"), first, counts[difficulty]))
+                    first += counts[difficulty]
+                for spool in spools.values():
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, f)
+        finally:
+            for spool in spools.values():
+                spool.close()
+
+
+class SearchStats:
+    """Opt-in counters and per-phase wall times for puzzle generation"""
+    
+    def __init__(self, log=None):
+        # Optional file-like object that receives one JSON object per line
+        self.log = log
+        self.reset()
+    
+    def reset(self):
+        """Zero every counter and timing"""
+        self.generations = 0
+        self.nodes = 0
+        self.backtracks = 0
+        # Emptied cells checked for another solution; count_calls has the
+        # searches, which forced cells do not need
+        self.uniqueness_checks = 0
+        self.count_calls = 0
+        self.ratings = 0
+        # Seconds per phase: fill, remove (which includes rate), verify, load, total
+        self.phases = {}
+    
+    def add_phase(self, name, seconds):
+        """Add wall time spent in a phase"""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+    
+    def merge(self, other):
+        """Add the totals of another stats object or as_dict() result"""
+        if isinstance(other, SearchStats):
+            other = other.as_dict()
+        for name in ("generations", "nodes", "backtracks", "uniqueness_checks",
+                     "count_calls", "ratings"):
+            setattr(self, name, getattr(self, name) + other[name])
+        for name, seconds in other['phases'].items():
+            self.add_phase(name, seconds)
+    
+    def as_dict(self):
+        return {
+            'generations': self.generations,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'uniqueness_checks': self.uniqueness_checks,
+            'count_calls': self.count_calls,
+            'ratings': self.ratings,
+            'phases': dict(self.phases)
+        }
+    
+    def emit(self, event, **fields):
+        """Write one structured log record, if logging is on"""
+        if self.log is not None:
+            fields['event'] = event
+            fields['time'] = time.time()
+            self.log.write(json.dumps(fields) + "\n")
+
+
+class GridTransform:
+    """Relabelling, line shuffles and transposition that keep a grid valid"""
+    
+    def __init__(self, digits, rows, cols, transpose=False):
+        # digits[v] is the new value of v, with digits[0] == 0 for empty
+        # cells; rows and cols give the source line of each line
+        self.digits = digits
+        self.rows = rows
+        self.cols = cols
+        self.transpose = transpose
+    
+    @classmethod
+    def random(cls, geometry, rng=random):
+        """A uniformly random transform of a board with the given geometry"""
+        box = geometry.box
+        
+        def lines():
+            # Whole bands (or stacks) move, then lines move within each one
+            order = []
+            for group in rng.sample(range(box), box):
+                order.extend(group * box + i for i in rng.sample(range(box), box))
+            return order
+        
+        digits = list(range(1, geometry.size + 1))
+        rng.shuffle(digits)
+        return cls([0] + digits, lines(), lines(), rng.random() < 0.5)
+    
+    def apply(self, board):
+        """Transformed copy of a grid or puzzle"""
+        digits = self.digits
+        if self.transpose:
+            return [[digits[board[c][r]] for c in self.cols] for r in self.rows]
+        return [[digits[board[r][c]] for c in self.cols] for r in self.rows]
+
+
+class GridSource:
+    """Full grids made by transforming seed grids, with fresh ones mixed in
+    
+    Without a seed, fresh grids become seeds too, so the grids served depend
+    on every earlier call. With a seed, seed grid k is always the one filled
+    from f"{seed}-{k}" and fresh grids are not kept, so a grid depends only
+    on the seed and the rng passed to next(); seeded grids are filled once
+    per process and shared by every source with the same seed, so keep
+    max_seeds small. One source may be shared by several threads.
+    """
+    
+    # Seed grids of seeded sources by (size, seed, index)
+    _seed_cache = {}
+    
+    def __init__(self, size=9, fresh_ratio=0.0, max_seeds=64, seed=None):
+        self.geometry = Geometry.of(size)
+        # Share of grids filled by search instead of transformed; unseeded,
+        # each one also becomes a seed, replacing a random old one past max_seeds
+        self.fresh_ratio = fresh_ratio
+        self.max_seeds = max_seeds
+        self.seed = seed
+        self.seeds = []
+        self.filler = BacktrackSolver(SudokuGame.NODE_LIMITS.get(size))
+        # The filler's node limit and counters, and the seeds, are shared state
+        self._lock = threading.Lock()
+        # Grids filled by search, seed grids included, and grids transformed
+        self.fresh = 0
+        self.transformed = 0
+    
+    def add_seed(self, grid):
+        """Use a solved grid as a seed (unseeded sources only)"""
+        with self._lock:
+            self.seeds.append([row[:] for row in grid])
+    
+    def next(self, rng=random):
+        """Return a new full grid"""
+        with self._lock:
+            if self.seed is not None:
+                if rng.random() < self.fresh_ratio:
+                    self.fresh += 1
+                    return self._fill(rng)
+                grid = self._seed_grid(rng.randrange(self.max_seeds))
+            elif not self.seeds or rng.random() < self.fresh_ratio:
+                grid = self._fill(rng)
+                if len(self.seeds) < self.max_seeds:
+                    self.seeds.append(grid)
+                else:
+                    self.seeds[rng.randrange(self.max_seeds)] = grid
+                self.fresh += 1
+                return [row[:] for row in grid]
+            else:
+                grid = rng.choice(self.seeds)
+            self.transformed += 1
+        return GridTransform.random(self.geometry, rng).apply(grid)
+    
+    def _seed_grid(self, index):
+        """Seed grid index of a seeded source, filled on first use in this process"""
+        key = (self.geometry.size, self.seed, index)
+        grid = self._seed_cache.get(key)
+        if grid is None:
+            grid = self._seed_cache[key] = self._fill(random.Random(f"{self.seed}-{index}"))
+            self.fresh += 1
+        return grid
+    
+    def _fill(self, rng):
+        """Fill an empty grid by randomized search, restarting past the node limit"""
+        constraints = ConstraintBoard(geometry=self.geometry)
+        while True:
+            try:
+                self.filler.fill(constraints, rng.shuffle)
+                return constraints.to_list()
+            except SearchBudgetExceeded:
+                pass
+
+
+GenerationReport = namedtuple(
+    "GenerationReport",
+    ["clues", "minimal", "redundant", "unchecked", "nodes", "seconds", "exhausted", "short"]
+)
+
+
+class GenerationBudget:
+    """Search nodes and wall time that clue removal may spend on one puzzle"""
+    
+    def __init__(self, solver, nodes=None, seconds=None):
+        self.solver = solver
+        self.nodes = nodes
+        self.seconds = seconds
+        # The solver's own per-search limit, put back by release
+        self.node_limit = solver.node_limit
+        self.start_nodes = solver.nodes
+        # The clock runs from the first search armed until release, so
+        # filling grids between removal passes is not charged
+        self.started = None
+        self.elapsed = 0.0
+        self.exhausted = False
+    
+    def spent(self):
+        """Check if the node or time allowance has run out"""
+        if self.nodes is not None and self.solver.nodes - self.start_nodes >= self.nodes:
+            return True
+        if self.seconds is None:
+            return False
+        elapsed = self.elapsed
+        if self.started is not None:
+            elapsed += time.perf_counter() - self.started
+        return elapsed >= self.seconds
+    
+    def arm(self):
+        """Cap the solver's next search at what is left; raises once nothing is"""
+        if self.started is None:
+            self.started = time.perf_counter()
+        if self.spent():
+            self.exhausted = True
+            raise SearchBudgetExceeded()
+        if self.nodes is not None:
+            left = self.nodes - (self.solver.nodes - self.start_nodes)
+            self.solver.node_limit = left if self.node_limit is None else min(left, self.node_limit)
+    
+    def release(self):
+        """Give the solver back its own per-search limit and stop the clock"""
+        self.solver.node_limit = self.node_limit
+        if self.started is not None:
+            self.elapsed += time.perf_counter() - self.started
+            self.started = None
+
+
+class SudokuGame:
+    """Sudoku game logic and puzzle generation"""
+    
+    # Cells removed from the full grid for each difficulty
+    CELLS_TO_REMOVE = {
+        "Easy": 30,
+        "Medium": 40,
+        "Hard": 50,
+        "Expert": 55,
+        "Master": 60
+    }
+    
+    # LogicalSolver rating band (lowest, highest) for graded generation
+    RATING_BANDS = {
+        "Easy": (1, 1),
+        "Medium": (1, 2),
+        "Hard": (2, 3),
+        "Expert": (3, 4),
+        "Master": (4, 6)
+    }
+    GRADED_ATTEMPTS = 30
+    
+    # Cell each clue-removal symmetry pairs (row, col) with on a board of side n
+    SYMMETRIES = {
+        "rotational": lambda row, col, n: (n - 1 - row, n - 1 - col),
+        "mirror": lambda row, col, n: (row, n - 1 - col),
+        "diagonal": lambda row, col, n: (col, row)
+    }
+    
+    # Nodes one fill or uniqueness search may visit on big boards. A fill
+    # that runs out restarts from scratch; a clue whose removal cannot be
+    # proven safe in time stays on the board.
+    NODE_LIMITS = {
+        16: 500,
+        25: 1000
+    }
+    
+    def __init__(self, solver="dlx", pool=None, seed=None, graded=False, size=9,
+                 grid_source=None):
+        self.geometry = Geometry.of(size)
+        self.board = self.geometry.empty_board()
+        self.solution = self.geometry.empty_board()
+        self.initial_board = self.geometry.empty_board()
+        self.difficulty = "Medium"
+        self.start_time = None
+        self.elapsed_time = 0
+        self.hints_used = 0
+        self.mistakes = 0
+        self.game_active = False
+        self.selected_cell = None
+        # Pencil marks and live candidates are digit masks per cell
+        self.notes = self.geometry.empty_board()
+        self.highlight_conflicts = True
+        self.auto_notes = False
+        self.constraints = ConstraintBoard(geometry=self.geometry)
+        self._cancel = None
+        self.pool = pool
+        self.graded = graded
+        self.rng = random.Random(seed)
+        # Full grids come from randomized backtracking, or from a GridSource
+        # of the same size when one is given
+        self.filler = BacktrackSolver(self.NODE_LIMITS.get(size))
+        self.grid_source = grid_source
+        # Set by enable_stats; None keeps instrumentation out of the way
+        self.stats = None
+        # GenerationReport of the last generated puzzle; None if it came from the pool
+        self.report = None
+        self.listeners = []
+        self.history = MoveHistory(size=size)
+        self.events = EventLog(size=size)
+        self._rebuild_index()
+        self.set_solver(solver)
+    
+    def set_size(self, size):
+        """Switch to an empty board of another side (4, 9, 16 or 25)"""
+        geometry = Geometry.of(size)
+        self.geometry = geometry
+        self.board = geometry.empty_board()
+        self.solution = geometry.empty_board()
+        self.initial_board = geometry.empty_board()
+        self.notes = geometry.empty_board()
+        self.constraints = ConstraintBoard(geometry=geometry)
+        self.game_active = False
+        self.selected_cell = None
+        self.history = MoveHistory(size=size)
+        self.events = EventLog(size=size)
+        self.filler.node_limit = self.solver.node_limit = self.NODE_LIMITS.get(size)
+        self._rebuild_index()
+        self._notify(None)
+        
+    def generate_puzzle(self, difficulty="Medium", cancel=None, seed=None, graded=None,
+                        symmetry=None, minimal=False, node_budget=None, time_budget=None):
+        """Generate a new Sudoku puzzle based on difficulty
+        
+        symmetry removes clues in pairs ("rotational", "mirror" or "diagonal"),
+        minimal keeps removing until no clue or pair can go, and node_budget
+        and time_budget cap the uniqueness searches spent on this puzzle. How
+        minimal and how costly the result was is left in self.report.
+        """
+        if symmetry is not None and symmetry not in self.SYMMETRIES:
+            raise ValueError(f"Unknown symmetry: {symmetry}")
+        
+        # A seed (or a random.Random) makes this puzzle reproducible
+        if isinstance(seed, random.Random):
+            self.rng = seed
+        elif seed is not None:
+            self.rng = random.Random(seed)
+        
+        if graded is None:
+            graded = self.graded
+        # Rating bands are calibrated on 9x9 puzzles
+        graded = graded and self.geometry.size == 9
+        
+        stats = self.stats
+        started = time.perf_counter()
+        before = self._search_counters()
+        
+        # Pooled puzzles are plain ones, made without symmetry or minimisation
+        if (self.pool is not None and seed is None and self.pool.graded == graded
+                and self.pool.size == self.geometry.size and symmetry is None and not minimal):
+            puzzle = self.pool.take(difficulty)
+            if puzzle is not None:
+                self.report = None
+                board = self.load_puzzle(puzzle[0], puzzle[1], difficulty)
+                if stats is not None:
+                    self._record_generation(difficulty, started, before, 0, None, True)
+                return board
+        
+        self.difficulty = difficulty
+        self.board = self.geometry.empty_board()
+        self.solution = self.geometry.empty_board()
+        self.constraints = ConstraintBoard(geometry=self.geometry)
+        # Setting the optional cancel event aborts with GenerationCancelled
+        self._cancel = cancel
+        
+        # Remove numbers based on difficulty, in proportion on other sizes
+        remove_count = self.CELLS_TO_REMOVE.get(difficulty, 40) * self.geometry.cells // 81
+        band = self.RATING_BANDS.get(difficulty, (1, LogicalSolver.GUESS_LEVEL)) if graded else None
+        
+        budget = GenerationBudget(self.solver, node_budget, time_budget)
+        best = None
+        attempts = 0
+        for _ in range(self.GRADED_ATTEMPTS if graded else 1):
+            attempts += 1
+            # Fill the board using backtracking
+            if stats is not None:
+                phase_start = time.perf_counter()
+            self.constraints = ConstraintBoard(geometry=self.geometry)
+            self._fill_board()
+            solution = self.constraints.to_list()
+            if stats is not None:
+                now = time.perf_counter()
+                stats.add_phase("fill", now - phase_start)
+                phase_start = now
+            
+            try:
+                rating = self._remove_numbers(remove_count, band, symmetry, minimal, budget)
+            finally:
+                budget.release()
+            if stats is not None:
+                stats.add_phase("remove", time.perf_counter() - phase_start)
+            if best is None or rating > best[0]:
+                best = (rating, self.constraints.to_list(), solution)
+            
+            # Puzzles easier than the band are rejected and regenerated,
+            # unless the budget has run out
+            if band is None or rating >= band[0] or budget.exhausted:
+                break
+        
+        _, puzzle, self.solution = best
+        redundant = unchecked = None
+        if minimal:
+            if stats is not None:
+                phase_start = time.perf_counter()
+            try:
+                redundant, unchecked = self._count_redundant(puzzle, budget)
+            finally:
+                budget.release()
+            if stats is not None:
+                stats.add_phase("verify", time.perf_counter() - phase_start)
+        self._cancel = None
+        
+        nodes = self._search_counters()[1] - before[1]
+        clues = sum(1 for row in puzzle for v in row if v)
+        self.report = GenerationReport(
+            clues=clues,
+            minimal=None if redundant is None else redundant == 0 and unchecked == 0,
+            redundant=redundant,
+            unchecked=unchecked,
+            nodes=nodes,
+            seconds=time.perf_counter() - started,
+            exhausted=budget.exhausted,
+            # Out of budget before the difficulty's clues were all removed
+            short=budget.exhausted and clues > self.geometry.cells - remove_count
+        )
+        if stats is None:
+            return self.load_puzzle(puzzle, self.solution, difficulty)
+        
+        phase_start = time.perf_counter()
+        board = self.load_puzzle(puzzle, self.solution, difficulty)
+        stats.add_phase("load", time.perf_counter() - phase_start)
+        self._record_generation(difficulty, started, before, attempts, best[0], False)
+        return board
+    
+    def enable_stats(self, log=None):
+        """Start collecting SearchStats, optionally logging JSON lines to log"""
+        self.stats = SearchStats(log)
+        return self.stats
+    
+    def disable_stats(self):
+        """Stop collecting; returns the stats gathered so far"""
+        stats, self.stats = self.stats, None
+        return stats
+    
+    def _search_counters(self):
+        """Solver and filler totals as (searches, nodes, backtracks)"""
+        return (self.solver.searches + self.filler.searches,
+                self.solver.nodes + self.filler.nodes,
+                self.solver.backtracks + self.filler.backtracks)
+    
+    def _record_generation(self, difficulty, started, before, attempts, rating, pooled):
+        """Fold one generate_puzzle call into the stats and log it"""
+        stats = self.stats
+        searches, nodes, backtracks = (
+            after - start for after, start in zip(self._search_counters(), before)
+        )
+        seconds = time.perf_counter() - started
+        stats.generations += 1
+        stats.count_calls += searches
+        stats.nodes += nodes
+        stats.backtracks += backtracks
+        stats.add_phase("total", seconds)
+        report = {} if pooled or self.report is None else {
+            'clues': self.report.clues,
+            'minimal': self.report.minimal,
+            'redundant': self.report.redundant,
+            'exhausted': self.report.exhausted,
+            'short': self.report.short
+        }
+        stats.emit("generate", difficulty=difficulty, seconds=seconds, pooled=pooled,
+                   attempts=attempts, rating=rating, count_calls=searches,
+                   nodes=nodes, backtracks=backtracks, **report)
+    
+    def load_puzzle(self, board, solution, difficulty="Medium"):
+        """Start a new game from a ready-made puzzle and its solution"""
+        if len(board) != self.geometry.size:
+            self.set_size(len(board))
+        self.difficulty = difficulty
+        self.board = copy.deepcopy(board)
+        self.solution = copy.deepcopy(solution)
+        self.initial_board = copy.deepcopy(board)
+        
+        # Reset game state
+        self.start_time = time.time()
+        self.elapsed_time = 0
+        self.hints_used = 0
+        self.mistakes = 0
+        self.game_active = True
+        self.selected_cell = None
+        self.notes = self.geometry.empty_board()
+        self.history = MoveHistory(size=self.geometry.size)
+        self.events = EventLog(size=self.geometry.size)
+        self._rebuild_index()
+        self._notify(None)
+        
+        return self.board
+    
+    def load_variant(self, seed=None):
+        """Start an equivalent game: the current puzzle relabelled and shuffled"""
+        # Logical techniques do not care about these transforms, so the
+        # variant rates exactly like the original
+        rng = self.rng if seed is None else random.Random(seed)
+        transform = GridTransform.random(self.geometry, rng)
+        return self.load_puzzle(transform.apply(self.initial_board),
+                                transform.apply(self.solution), self.difficulty)
+    
+    def rate_puzzle(self):
+        """Rate the current puzzle's starting position with LogicalSolver"""
+        return LogicalSolver(self.initial_board).rate()
+    
+    def load_from_bank(self, bank, difficulty, index=None):
+        """Start a game from a puzzle bank, by index or at random"""
+        if index is None:
+            board, solution = bank.random(difficulty, self.rng)
+        else:
+            board, solution = bank.get(difficulty, index)
+        return self.load_puzzle(board, solution, difficulty)
+    
+    def _fill_board(self):
+        """Fill the board by randomized search with propagation"""
+        if self.grid_source is not None and self.grid_source.geometry is self.geometry:
+            self.constraints.load(self.grid_source.next(self.rng))
+            return True
+        
+        # On big boards a random start now and then runs into a huge dead
+        # subtree; restarting once the node budget is spent is much cheaper
+        while True:
+            try:
+                return self.filler.fill(self.constraints, self.rng.shuffle)
+            except SearchBudgetExceeded:
+                if self._cancel is not None and self._cancel.is_set():
+                    raise GenerationCancelled()
+    
+    def _orbits(self, symmetry):
+        """Cells grouped as the symmetry pairs them, in random order"""
+        size = self.geometry.size
+        cells = [(r, c) for r in range(size) for c in range(size)]
+        if symmetry is None:
+            self.rng.shuffle(cells)
+            return [(cell,) for cell in cells]
+        
+        image = self.SYMMETRIES[symmetry]
+        orbits = []
+        seen = set()
+        for row, col in cells:
+            if (row, col) not in seen:
+                orbit = tuple(sorted({(row, col), image(row, col, size)}))
+                seen.update(orbit)
+                orbits.append(orbit)
+        self.rng.shuffle(orbits)
+        return orbits
+    
+    def _ambiguous(self, constraints, cells, values, budget=None):
+        """Check if emptied cells admit a solution other than their values
+        
+        Returns None when that is undecided because a search hit the
+        solver's own node limit.
+        """
+        # Any other solution differs from this one in at least one of the cells
+        undecided = False
+        for (row, col), value in zip(cells, values):
+            if self.stats is not None:
+                self.stats.uniqueness_checks += 1
+            # A cell the remaining clues force to value needs no search
+            if constraints.candidates(row, col) == 1 << (value - 1):
+                continue
+            if budget is not None:
+                budget.arm()
+            try:
+                if self.solver.has_other_solution(constraints, row, col, value):
+                    return True
+            except SearchBudgetExceeded:
+                # Past the puzzle's budget this ends removal; past the
+                # solver's own limit this cell stays undecided
+                if budget is not None and budget.spent():
+                    budget.exhausted = True
+                    raise
+                undecided = True
+        return None if undecided else False
+    
+    def _count_redundant(self, board, budget=None):
+        """(redundant, unchecked): clues whose removal alone keeps board unique"""
+        # Unchecked counts clues left undecided by the solver's node limit,
+        # and every clue after the puzzle's budget ran out
+        constraints = ConstraintBoard(board, self.geometry)
+        clues = [(r, c) for r, row in enumerate(board) for c, v in enumerate(row) if v]
+        redundant = 0
+        undecided = 0
+        for checked, (row, col) in enumerate(clues):
+            value = board[row][col]
+            constraints.unplace(row, col)
+            try:
+                ambiguous = self._ambiguous(constraints, ((row, col),), (value,), budget)
+            except SearchBudgetExceeded:
+                return redundant, undecided + len(clues) - checked
+            finally:
+                constraints.place(row, col, value)
+            if ambiguous is None:
+                undecided += 1
+            elif not ambiguous:
+                redundant += 1
+        return redundant, undecided
+    
+    def _remove_numbers(self, count, band=None, symmetry=None, minimal=False, budget=None):
+        """Remove numbers while ensuring a unique solution; returns the rating"""
+        # With a (lowest, highest) rating band, removals needing a technique
+        # above it are undone, and removal goes past count until it is reached.
+        # Clues go one symmetry orbit at a time; minimal ignores count and
+        # tries every orbit, which leaves no orbit that could still go.
+        removed = 0
+        rating = 0
+        for orbit in self._orbits(symmetry):
+            if removed >= count and not minimal and (band is None or rating >= band[0]):
+                break
+            if self._cancel is not None and self._cancel.is_set():
+                raise GenerationCancelled()
+                
+            # Store the values
+            values = [self.constraints.grid[row][col] for row, col in orbit]
+            if 0 in values:
+                continue
+                
+            # Try removing them
+            for row, col in orbit:
+                self.constraints.unplace(row, col)
+            
+            # The puzzle stays unique unless another digit fits in one of them
+            try:
+                ambiguous = self._ambiguous(self.constraints, orbit, values, budget)
+            except SearchBudgetExceeded:
+                # Out of budget: the puzzle keeps every clue still on it
+                self._restore(orbit, values)
+                break
+            if ambiguous is not False:
+                # Undecided removals are given up like ambiguous ones
+                self._restore(orbit, values)
+                continue
+            
+            if band is not None:
+                # Rating stops as soon as a harder technique would be needed
+                if self.stats is None:
+                    new_rating = LogicalSolver(self.constraints.grid).rate(band[1])
+                else:
+                    phase_start = time.perf_counter()
+                    new_rating = LogicalSolver(self.constraints.grid).rate(band[1])
+                    self.stats.ratings += 1
+                    self.stats.add_phase("rate", time.perf_counter() - phase_start)
+                if new_rating > band[1]:
+                    self._restore(orbit, values)
+                    continue
+                rating = new_rating
+            removed += len(orbit)
+        
+        return rating
+    
+    def _restore(self, cells, values):
+        """Put removed clues back on the constraint board"""
+        for (row, col), value in zip(cells, values):
+            self.constraints.place(row, col, value)
+    
+    def add_listener(self, callback):
+        """Call callback(cells) on every change; cells is None for all cells"""
+        self.listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Stop sending change events to callback"""
+        self.listeners.remove(callback)
+    
+    def _notify(self, cells):
+        for callback in self.listeners:
+            callback(cells)
+    
+    def _set_value(self, row, col, num):
+        """Write a cell and report it if the value actually changed"""
+        old = self.board[row][col]
+        if old == num:
+            return
+        self.board[row][col] = num
+        
+        # Cells whose conflict state flips are reported along with this one
+        changed = {(row, col)}
+        if old:
+            self._unindex(row, col, old, changed)
+        if num:
+            self._index(row, col, num, changed)
+        self._notify(changed)
+    
+    def _set_notes(self, row, col, notes):
+        """Write a cell's notes and report it if they are on display"""
+        if self.notes[row][col] != notes:
+            self.notes[row][col] = notes
+            if not self.auto_notes:
+                self._notify({(row, col)})
+    
+    def _elapsed_ms(self):
+        """Milliseconds of play so far, used to timestamp events"""
+        if self.game_active and self.start_time:
+            return int((time.time() - self.start_time) * 1000)
+        return self.elapsed_time * 1000
+    
+    def _record(self, kind, row, col, old, old_notes, linked=False, mistake=False):
+        """Log a move on (row, col) if it changed the value or the notes
+        
+        Mistakes always reach the event log, even when the wrong number
+        was taken straight back off the board.
+        """
+        new = self.board[row][col]
+        new_notes = self.notes[row][col]
+        changed = old != new or old_notes != new_notes
+        cell = row * self.geometry.size + col
+        if changed:
+            self.history.record(kind, int(linked), cell, old, new, old_notes, new_notes)
+        if changed or mistake:
+            self.events.append(self._elapsed_ms(), kind, int(linked), cell,
+                               old, new, old_notes, new_notes, mistake)
+        return changed
+    
+    def replay(self):
+        """Replay of this game's event log"""
+        return GameReplay(self.initial_board, self.events.records, self.events.times)
+    
+    def undo(self):
+        """Undo the last move; returns the cells it touched"""
+        if not self.game_active:
+            return []
+        cells = []
+        while True:
+            move = self.history.undo()
+            if move is None:
+                break
+            kind, linked, cell, old, new, old_notes, new_notes = move
+            row, col = divmod(cell, self.geometry.size)
+            self._set_notes(row, col, old_notes)
+            self._set_value(row, col, old)
+            self.events.append(self._elapsed_ms(), MoveHistory.UNDO, int(bool(cells)),
+                               cell, new, old, new_notes, old_notes)
+            cells.append((row, col))
+            if not linked:
+                break
+        return cells
+    
+    def redo(self):
+        """Redo the last undone move; returns the cells it touched"""
+        if not self.game_active:
+            return []
+        cells = []
+        while True:
+            move = self.history.redo()
+            if move is None:
+                break
+            kind, linked, cell, old, new, old_notes, new_notes = move
+            row, col = divmod(cell, self.geometry.size)
+            self._set_value(row, col, new)
+            self._set_notes(row, col, new_notes)
+            self.events.append(self._elapsed_ms(), MoveHistory.REDO, int(bool(cells)),
+                               cell, old, new, old_notes, new_notes)
+            cells.append((row, col))
+            if not self.history.next_linked():
+                break
+        return cells
+    
+    def _rebuild_index(self):
+        """Recount digits per unit and recompute conflicts and candidates"""
+        size = self.geometry.size
+        cell_units = self.geometry.cell_units
+        self.unit_counts = [[0] * (size + 1) for _ in range(3 * size)]
+        self.unit_masks = [0] * (3 * size)
+        for row in range(size):
+            for col in range(size):
+                num = self.board[row][col]
+                if num:
+                    for unit in cell_units[row][col]:
+                        self.unit_counts[unit][num] += 1
+                        self.unit_masks[unit] |= 1 << (num - 1)
+        self.conflicts = {
+            (row, col) for row in range(size) for col in range(size)
+            if self.board[row][col] and self._clashes(row, col, self.board[row][col])
+        }
+        self.candidates = [[self._unit_candidates(row, col) for col in range(size)]
+                           for row in range(size)]
+    
+    def _unit_candidates(self, row, col):
+        """Digits missing from all three units of (row, col)"""
+        units = self.geometry.cell_units[row][col]
+        masks = self.unit_masks
+        return ~(masks[units[0]] | masks[units[1]] | masks[units[2]]) & self.geometry.all_digits
+    
+    def _refresh_unit(self, unit, changed):
+        """Recompute candidates for the cells of a unit whose digit set moved"""
+        for row, col in self.geometry.units[unit]:
+            candidates = self._unit_candidates(row, col)
+            if candidates != self.candidates[row][col]:
+                self.candidates[row][col] = candidates
+                if self.auto_notes and self.board[row][col] == 0:
+                    changed.add((row, col))
+    
+    def _clashes(self, row, col, num):
+        """Check if num appears more than once in any unit of (row, col)"""
+        return any(self.unit_counts[unit][num] > 1
+                   for unit in self.geometry.cell_units[row][col])
+    
+    def _index(self, row, col, num, changed):
+        """Count num placed at (row, col) and flag any new conflicts"""
+        for unit in self.geometry.cell_units[row][col]:
+            self.unit_counts[unit][num] += 1
+            if self.unit_counts[unit][num] == 1:
+                self.unit_masks[unit] |= 1 << (num - 1)
+                self._refresh_unit(unit, changed)
+            elif self.unit_counts[unit][num] > 1:
+                for cell in self.geometry.units[unit]:
+                    if self.board[cell[0]][cell[1]] == num and cell not in self.conflicts:
+                        self.conflicts.add(cell)
+                        changed.add(cell)
+    
+    def _unindex(self, row, col, num, changed):
+        """Uncount num taken from (row, col) and clear resolved conflicts"""
+        if (row, col) in self.conflicts:
+            self.conflicts.discard((row, col))
+            changed.add((row, col))
+        for unit in self.geometry.cell_units[row][col]:
+            self.unit_counts[unit][num] -= 1
+            if self.unit_counts[unit][num] == 0:
+                self.unit_masks[unit] &= ~(1 << (num - 1))
+                self._refresh_unit(unit, changed)
+            elif self.unit_counts[unit][num] == 1:
+                for cell in self.geometry.units[unit]:
+                    if (self.board[cell[0]][cell[1]] == num and cell in self.conflicts
+                            and not self._clashes(cell[0], cell[1], num)):
+                        self.conflicts.discard(cell)
+                        changed.add(cell)
+    
+    def is_conflicting(self, row, col):
+        """Check if the digit at (row, col) repeats in its row, column or box"""
+        return (row, col) in self.conflicts
+    
+    def conflicting_cells(self):
+        """Return the set of all cells currently in conflict"""
+        return set(self.conflicts)
+    
+    def get_candidates(self, row, col):
+        """Mask of digits not yet used in the row, column or box of (row, col)"""
+        return self.candidates[row][col]
+    
+    def get_notes(self, row, col):
+        """Mask of pencil marks to show: live candidates in auto-notes mode"""
+        if self.auto_notes:
+            return self.candidates[row][col]
+        return self.notes[row][col]
+    
+    def set_auto_notes(self, enabled):
+        """Switch between the player's own notes and live candidates"""
+        if self.auto_notes != enabled:
+            self.auto_notes = enabled
+            self._notify(None)
+    
+    def select_cell(self, cell):
+        """Select a cell (or None) and report the cells whose selection changed"""
+        old = self.selected_cell
+        if old == cell:
+            return
+        self.selected_cell = cell
+        self._notify({c for c in (old, cell) if c is not None})
+    
+    def _count_solutions(self, board, limit=2):
+        """Count number of solutions (used for uniqueness check)"""
+        if self.stats is not None:
+            self.stats.count_calls += 1
+        return self.solver.count_solutions(board, limit)
+    
+    def set_solver(self, name):
+        """Select the solver backend used for counting and solving"""
+        if name not in SOLVERS:
+            raise ValueError(f"Unknown solver: {name}")
+        self.solver = SOLVERS[name](self.NODE_LIMITS.get(self.geometry.size))
+    
+    def is_correct(self, row, col, num):
+        """Check if placed number matches solution"""
+        return self.solution[row][col] == num
+    
+    def get_hint(self):
+        """Get a hint (reveal a correct cell)"""
+        if not self.game_active:
+            return None
+            
+        # Find an empty cell
+        size = self.geometry.size
+        empty_cells = [(r, c) for r in range(size) for c in range(size)
+                      if self.board[r][c] == 0]
+        
+        if not empty_cells:
+            return None
+            
+        row, col = self.rng.choice(empty_cells)
+        correct_value = self.solution[row][col]
+        
+        # Update board
+        self.hints_used += 1
+        old_notes = self.notes[row][col]
+        self._set_value(row, col, correct_value)
+        self._record(MoveHistory.HINT, row, col, 0, old_notes)
+        
+        return row, col, correct_value
+    
+    def get_logical_hint(self):
+        """Get the next logical step for the current board and notes"""
+        if not self.game_active:
+            return None
+        
+        # Deductions from a wrong board would be wrong, so point those out first
+        size = self.geometry.size
+        wrong = [(r, c) for r in range(size) for c in range(size)
+                 if self.board[r][c] and self.board[r][c] != self.solution[r][c]]
+        if wrong:
+            return SolveStep("Incorrect Entry", 0, wrong, [], None)
+        
+        # Notes narrow the search unless they rule out the answer; they also
+        # carry the eliminations of earlier hints, so those are not repeated
+        candidates = [[self.geometry.all_digits] * size for _ in range(size)]
+        for row in range(size):
+            for col in range(size):
+                notes = self.notes[row][col]
+                if notes & (1 << (self.solution[row][col] - 1)):
+                    candidates[row][col] = notes
+        
+        # Only the first step found is returned; eliminations alone are a hint
+        step = LogicalSolver(self.board, candidates).find_step()
+        if step is None:
+            # Only guessing would help: reveal a cell instead
+            empty_cells = [(r, c) for r in range(size) for c in range(size)
+                           if self.board[r][c] == 0]
+            if not empty_cells:
+                return None
+            row, col = self.rng.choice(empty_cells)
+            step = SolveStep("Reveal", LogicalSolver.GUESS_LEVEL, [(row, col)], [],
+                             (row, col, self.solution[row][col]))
+        
+        # Apply the step: eliminations trim notes (filling in the candidates
+        # of cells without usable notes first), a placement counts as a hint
+        linked = False
+        for row, col, num in step.eliminations:
+            old_notes = self.notes[row][col]
+            notes = old_notes
+            if not notes & (1 << (self.solution[row][col] - 1)):
+                notes = self.candidates[row][col]
+            self._set_notes(row, col, notes & ~(1 << (num - 1)))
+            if self._record(MoveHistory.HINT, row, col, self.board[row][col], old_notes, linked):
+                linked = True
+        if step.placement is not None:
+            row, col, num = step.placement
+            self.hints_used += 1
+            old_notes = self.notes[row][col]
+            self._set_value(row, col, num)
+            self._record(MoveHistory.HINT, row, col, 0, old_notes, linked)
+        
+        return step
+    
+    def check_solution(self):
+        """Check if current board matches solution"""
+        return self.board == self.solution
+    
+    def solve_puzzle(self):
+        """Solve the current puzzle completely"""
+        if not self.game_active:
+            return
+            
+        ms = self._elapsed_ms()
+        size = self.geometry.size
+        linked = 0
+        for row in range(size):
+            for col in range(size):
+                old = self.board[row][col]
+                if old != self.solution[row][col]:
+                    notes = self.notes[row][col]
+                    self.events.append(ms, MoveHistory.SOLVE, linked, row * size + col,
+                                       old, self.solution[row][col], notes, notes)
+                    linked = 1
+        
+        self.board = copy.deepcopy(self.solution)
+        self._rebuild_index()
+        self._notify(None)
+        return True
+    
+    def place_number(self, row, col, num):
+        """Place a number on the board"""
+        if not self.game_active:
+            return False, "Game not active"
+            
+        if self.initial_board[row][col] != 0:
+            return False, "Cannot modify initial numbers"
+            
+        if num < 1 or num > self.geometry.size:
+            return False, "Invalid number"
+            
+        old = self.board[row][col]
+        old_notes = self.notes[row][col]
+        
+        # Check if correct
+        if not self.is_correct(row, col, num):
+            self.mistakes += 1
+            if self.highlight_conflicts:
+                self._set_value(row, col, num)
+                self._record(MoveHistory.PLACE, row, col, old, old_notes, mistake=True)
+                return False, "Incorrect"
+            else:
+                self._set_value(row, col, 0)
+                self._record(MoveHistory.PLACE, row, col, old, old_notes, mistake=True)
+                return False, "Incorrect - number removed"
+        
+        self._set_value(row, col, num)
+        self._record(MoveHistory.PLACE, row, col, old, old_notes)
+        
+        # Check if puzzle is complete
+        if self.check_solution():
+            self.game_active = False
+            return True, "Puzzle completed!"
+            
+        return True, "Correct"
+    
+    def toggle_note(self, row, col, num):
+        """Toggle a note/pencil mark"""
+        if not self.game_active:
+            return
+            
+        if self.initial_board[row][col] == 0:
+            old_notes = self.notes[row][col]
+            self._set_notes(row, col, old_notes ^ (1 << (num - 1)))
+            self._record(MoveHistory.NOTE, row, col, self.board[row][col], old_notes)
+    
+    def clear_cell(self, row, col):
+        """Clear a cell"""
+        if not self.game_active:
+            return
+            
+        if self.initial_board[row][col] == 0:
+            old = self.board[row][col]
+            old_notes = self.notes[row][col]
+            # Clear notes for this cell
+            self._set_notes(row, col, 0)
+            self._set_value(row, col, 0)
+            self._record(MoveHistory.CLEAR, row, col, old, old_notes)
+    
+    def get_conflicts(self, row, col, num):
+        """Get conflicting cells for a given number"""
+        conflicts = []
+        
+        if num == 0:
+            return conflicts
+        
+        size = self.geometry.size
+        box = self.geometry.box
+        
+        # Check row
+        for c in range(size):
+            if c != col and self.board[row][c] == num:
+                conflicts.append((row, c))
+        
+        # Check column
+        for r in range(size):
+            if r != row and self.board[r][col] == num:
+                conflicts.append((r, col))
+        
+        # Check box
+        box_row, box_col = row // box, col // box
+        for r in range(box_row * box, box_row * box + box):
+            for c in range(box_col * box, box_col * box + box):
+                if (r != row or c != col) and self.board[r][c] == num:
+                    conflicts.append((r, c))
+        
+        return conflicts
+    
+    def update_time(self):
+        """Update elapsed time"""
+        if self.game_active and self.start_time:
+            self.elapsed_time = int(time.time() - self.start_time)
+    
+    def get_state(self, json_notes=False):
+        """Current game state as the dict written by save_game
+        
+        json_notes gives the notes as flag lists, as JSON saves keep them.
+        """
+        game_state = {
+            'board': self.board,
+            'initial_board': self.initial_board,
+            'solution': self.solution,
+            'difficulty': self.difficulty,
+            'elapsed_time': self.elapsed_time,
+            'hints_used': self.hints_used,
+            'mistakes': self.mistakes,
+            'game_active': self.game_active,
+            'notes': self.notes,
+            'history': list(self.history.records),
+            'history_cursor': self.history.cursor,
+            'events': list(self.events.records),
+            'event_times': list(self.events.times),
+            'timestamp': datetime.now().isoformat()
+        }
+        if json_notes:
+            # JSON keeps the original 9x9x9 note flags for compatibility
+            game_state['notes'] = PuzzleCodec.notes_to_flags(self.notes)
+        return game_state
+    
+    def save_game(self, filename, fmt=None):
+        """Save current game state to file (JSON, or binary for .sdkb)"""
+        if fmt is None:
+            fmt = "binary" if filename.endswith(".sdkb") else "json"
+        
+        if fmt == "binary":
+            with open(filename, 'wb') as f:
+                f.write(PuzzleCodec.pack_game(self.get_state()))
+        else:
+            with open(filename, 'w') as f:
+                json.dump(self.get_state(json_notes=True), f)
+    
+    def set_state(self, game_state):
+        """Restore a state dict from get_state, a JSON save or a binary save"""
+        if len(game_state['board']) != self.geometry.size:
+            self.set_size(len(game_state['board']))
+        self.board = game_state['board']
+        self.initial_board = game_state['initial_board']
+        self.solution = game_state['solution']
+        self.difficulty = game_state['difficulty']
+        self.elapsed_time = game_state['elapsed_time']
+        self.hints_used = game_state['hints_used']
+        self.mistakes = game_state['mistakes']
+        self.game_active = game_state['game_active']
+        self.notes = game_state['notes']
+        if self.notes and isinstance(self.notes[0][0], list):
+            self.notes = PuzzleCodec.flags_to_notes(self.notes)
+        self.history = MoveHistory(
+            game_state.get('history', ()),
+            game_state.get('history_cursor'),
+            self.geometry.size
+        )
+        self.events = EventLog(
+            game_state.get('events', ()),
+            game_state.get('event_times', ()),
+            self.geometry.size
+        )
+        
+        # Update start time if game is active
+        if self.game_active:
+            self.start_time = time.time() - self.elapsed_time
+        
+        self._rebuild_index()
+        self._notify(None)
+    
+    def load_game(self, filename):
+        """Load game state from file, detecting JSON or binary"""
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+            
+            if data.startswith(PuzzleCodec.MAGIC):
+                game_state = PuzzleCodec.unpack_game(data)
+            else:
+                game_state = json.loads(data)
+            
+            self.set_state(game_state)
+            return True
+        except:
+            return False
+
+
+class PuzzlePool:
+    """Pre-generated puzzles per difficulty, kept topped up by worker threads"""
+    
+    def __init__(self, low_water=3, solver="dlx", graded=False, start=True, size=9,
+                 grid_source=None):
+        self.low_water = low_water
+        self.solver = solver
+        self.graded = graded
+        self.size = size
+        # Optional GridSource shared by the refill workers
+        self.grid_source = grid_source
+        self.buckets = {name: deque() for name in SudokuGame.CELLS_TO_REMOVE}
+        self.hits = 0
+        self.misses = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._workers = []
+        if start:
+            self.start()
+    
+    def start(self):
+        """Start one refill worker per difficulty"""
+        self._stopped = False
+        for difficulty in self.buckets:
+            worker = threading.Thread(
+                target=self._refill,
+                args=(difficulty,),
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+    
+    def stop(self):
+        """Stop the refill workers after their current puzzle"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._workers = []
+    
+    def take(self, difficulty):
+        """Pop a (board, solution) pair, or None if the bucket is empty"""
+        with self._condition:
+            bucket = self.buckets.get(difficulty)
+            if not bucket:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._condition.notify_all()
+            return bucket.popleft()
+    
+    def stats(self):
+        """Hit/miss counters and current bucket sizes"""
+        with self._condition:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'sizes': {name: len(bucket) for name, bucket in self.buckets.items()}
+            }
+    
+    def _refill(self, difficulty):
+        """Worker loop: keep one bucket at the low-water mark"""
+        generator = SudokuGame(self.solver, graded=self.graded, size=self.size,
+                               grid_source=self.grid_source)
+        bucket = self.buckets[difficulty]
+        while True:
+            with self._condition:
+                while len(bucket) >= self.low_water and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+            
+            generator.generate_puzzle(difficulty)
+            with self._condition:
+                bucket.append((generator.board, generator.solution))
@@ -0,0 +1,484 @@
+"""Asyncio HTTP server hosting many Sudoku games from one process
+
+Requests and responses are JSON:
+
+    POST /games                  {"difficulty": "Hard", "seed": 7}  new game
+                                 {"size": 16} for 4, 9, 16 or 25 wide boards
+    GET  /games/<id>                                                game state
+    POST /games/<id>/place       {"row": 0, "col": 4, "num": 7}
+    POST /games/<id>/clear       {"row": 0, "col": 4}
+    POST /games/<id>/note        {"row": 0, "col": 4, "num": 7}
+    POST /games/<id>/hint        {"logical": true}
+    POST /games/<id>/undo
+    POST /games/<id>/redo
+    GET  /games/<id>/check
+    GET  /games/<id>/save                                           save state
+    POST /games/load             <save state>                       new game
+    DELETE /games/<id>
+
+Puzzles are generated on a process pool so the event loop never waits on
+a solver.
+"""
+import asyncio
+import http.client
+import json
+import sys
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_engine import LogicalSolver, PuzzleCodec, RecordLayout, SudokuGame
+
+
+_generators = {}
+
+
+def _generate(difficulty, solver, graded, seed, size=9):
+    """Process pool worker: generate one puzzle and its solution"""
+    # One generator per solver, size and process keeps the solver tables warm
+    generator = _generators.get((solver, size))
+    if generator is None:
+        generator = _generators[solver, size] = SudokuGame(solver, size=size)
+    generator.generate_puzzle(difficulty, seed=seed, graded=graded)
+    return generator.board, generator.solution
+
+
+class SessionStore:
+    """Games by session id, bounded in number and evicted when idle"""
+    
+    def __init__(self, max_sessions=10000, idle_timeout=1800):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        # Least recently used first, so eviction pops from the front
+        self.sessions = OrderedDict()
+        self.evicted = 0
+    
+    def __len__(self):
+        return len(self.sessions)
+    
+    def add(self, game):
+        """Store a game under a new session id and return the id"""
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = [game, time.monotonic()]
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+        return session_id
+    
+    def get(self, session_id):
+        """Look up a game and mark it as used; KeyError if unknown"""
+        entry = self.sessions[session_id]
+        entry[1] = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return entry[0]
+    
+    def remove(self, session_id):
+        """Drop a session; KeyError if unknown"""
+        del self.sessions[session_id]
+    
+    def evict_idle(self, now=None):
+        """Drop sessions idle longer than idle_timeout; returns how many"""
+        if now is None:
+            now = time.monotonic()
+        count = 0
+        while self.sessions:
+            session_id, (_, last_used) = next(iter(self.sessions.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            del self.sessions[session_id]
+            count += 1
+        self.evicted += count
+        return count
+
+
+class HTTPError(Exception):
+    """Error answered with an HTTP status and a JSON message"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SudokuServer:
+    """Minimal HTTP/1.1 JSON API around SudokuGame sessions"""
+    
+    REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large",
+               500: "Internal Server Error"}
+    MAX_BODY = 1 << 20
+    
+    def __init__(self, host="127.0.0.1", port=8080, workers=None, solver="dlx",
+                 graded=False, store=None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.solver = solver
+        self.graded = graded
+        self.store = store if store is not None else SessionStore()
+        self.executor = None
+        self.server = None
+        self._reaper = None
+    
+    async def start(self):
+        """Start the worker processes, the listener and the idle reaper"""
+        self.executor = ProcessPoolExecutor(self.workers)
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # With port 0 the OS picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._reaper = asyncio.ensure_future(self._reap())
+    
+    async def close(self):
+        """Stop listening and shut the worker processes down"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+    
+    async def _reap(self):
+        """Evict idle sessions every so often"""
+        interval = max(1, min(60, self.store.idle_timeout / 4))
+        while True:
+            await asyncio.sleep(interval)
+            self.store.evict_idle()
+    
+    async def _handle(self, reader, writer):
+        """Serve requests on one connection until it closes"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except (KeyError, ValueError, TypeError, IndexError) as e:
+                    status, payload = 400, {'error': f"Bad request: {e}"}
+                except Exception:
+                    # Answer anyway, so a bug never leaves the client hanging
+                    traceback.print_exc(file=sys.stderr)
+                    status, payload = 500, {'error': "Internal server error"}
+                
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            self._write_response(writer, e.status, {'error': str(e)}, False)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _read_request(self, reader):
+        """Read one request; None once the client has hung up"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Malformed Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Malformed Content-Length")
+        if length > self.MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+    
+    def _write_response(self, writer, status, payload, keep_alive):
+        """Write a JSON response"""
+        data = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {self.REASONS.get(status, 'Unknown')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode("latin-1") + data
+        )
+    
+    async def dispatch(self, method, path, body):
+        """Route one request; returns (status, payload)"""
+        params = json.loads(body) if body else {}
+        if not isinstance(params, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        parts = [part for part in path.split("/") if part]
+        if not parts or parts[0] != "games":
+            raise HTTPError(404, f"No such endpoint: {path}")
+        
+        if len(parts) == 1:
+            self._expect(method, "POST")
+            return 201, await self.new_game(params)
+        if parts[1:] == ["load"]:
+            self._expect(method, "POST")
+            return 201, self.load_game(params)
+        
+        try:
+            game = self.store.get(parts[1])
+        except KeyError:
+            raise HTTPError(404, f"No such game: {parts[1]}")
+        
+        if len(parts) == 2:
+            if method == "DELETE":
+                self.store.remove(parts[1])
+                return 200, {'deleted': parts[1]}
+            self._expect(method, "GET")
+            return 200, self.game_view(parts[1], game)
+        
+        action = parts[2] if len(parts) == 3 else None
+        handler = self.ACTIONS.get(action)
+        if handler is None:
+            raise HTTPError(404, f"No such endpoint: {path}")
+        self._expect(method, "GET" if action in ("check", "save") else "POST")
+        return 200, handler(self, parts[1], game, params)
+    
+    def _expect(self, method, allowed):
+        if method != allowed:
+            raise HTTPError(405, f"Use {allowed}")
+    
+    async def new_game(self, params):
+        """Generate a puzzle on the process pool and open a session for it"""
+        difficulty = params.get('difficulty', "Medium")
+        if difficulty not in SudokuGame.CELLS_TO_REMOVE:
+            raise ValueError(f"Unknown difficulty: {difficulty}")
+        size = int(params.get('size', 9))
+        if size not in (4, 9, 16, 25):
+            raise ValueError("size must be 4, 9, 16 or 25")
+        loop = asyncio.get_running_loop()
+        board, solution = await loop.run_in_executor(
+            self.executor, _generate, difficulty, self.solver,
+            params.get('graded', self.graded), params.get('seed'), size
+        )
+        
+        game = SudokuGame(self.solver, size=size)
+        game.load_puzzle(board, solution, difficulty)
+        session_id = self.store.add(game)
+        return self.game_view(session_id, game)
+    
+    def load_game(self, params):
+        """Open a session from a state returned by the save endpoint"""
+        self._check_state(params)
+        game = SudokuGame(self.solver)
+        game.set_state(params)
+        session_id = self.store.add(game)
+        try:
+            return self.game_view(session_id, game)
+        except Exception:
+            self.store.remove(session_id)
+            raise
+    
+    @staticmethod
+    def _check_state(state):
+        """Reject a client-supplied save state that set_state cannot trust"""
+        def grid(name, low):
+            value = state[name]
+            if not (isinstance(value, list) and len(value) == size and all(
+                    isinstance(row, list) and len(row) == size and all(
+                        type(v) is int and low <= v <= size for v in row)
+                    for row in value)):
+                raise ValueError(f"{name} must be {size} rows of {size} digits {low}-{size}")
+        
+        def count(name, kind=int):
+            value = state[name]
+            if type(value) is bool or not isinstance(value, kind) or value < 0:
+                raise ValueError(f"{name} must be a non-negative number")
+        
+        def records(name, limit):
+            value = state.get(name, [])
+            if not (isinstance(value, list) and all(
+                    type(v) is int and 0 <= v < limit for v in value)):
+                raise ValueError(f"{name} must be a list of move records")
+            for record in value:
+                _, _, cell, old, new, _, _ = layout.unpack(record)
+                if cell >= size * size or old > size or new > size:
+                    raise ValueError(f"{name} holds a move outside the board")
+            return value
+        
+        if not isinstance(state, dict) or not isinstance(state.get('board'), list):
+            raise ValueError("board must be a list of rows")
+        size = len(state['board'])
+        if size not in (4, 9, 16, 25):
+            raise ValueError("board must be 4, 9, 16 or 25 rows")
+        layout = RecordLayout.of(size)
+        grid('board', 0)
+        grid('initial_board', 0)
+        grid('solution', 1)
+        if state['difficulty'] not in SudokuGame.CELLS_TO_REMOVE:
+            raise ValueError(f"Unknown difficulty: {state['difficulty']}")
+        count('elapsed_time', (int, float))
+        count('hints_used')
+        count('mistakes')
+        if type(state['game_active']) is not bool:
+            raise ValueError("game_active must be true or false")
+        
+        # Notes come as masks, or as the size x size x size flags of a JSON save
+        notes = state['notes']
+        if not (isinstance(notes, list) and len(notes) == size and all(
+                isinstance(row, list) and len(row) == size for row in notes)):
+            raise ValueError(f"notes must be {size} rows of {size} cells")
+        cells = [cell for row in notes for cell in row]
+        if not (all(type(cell) is int and 0 <= cell < 1 << size for cell in cells) or all(
+                isinstance(cell, list) and len(cell) == size and
+                all(type(flag) in (bool, int) for flag in cell) for cell in cells)):
+            raise ValueError(f"notes must be {size}-bit masks or lists of {size} flags")
+        
+        history = records('history', layout.mistake)
+        cursor = state.get('history_cursor')
+        if cursor is not None and not (type(cursor) is int and 0 <= cursor <= len(history)):
+            raise ValueError("history_cursor must index the history")
+        events = records('events', layout.mistake << 1)
+        times = state.get('event_times', [])
+        if not (isinstance(times, list) and len(times) == len(events) and all(
+                type(ms) is int and 0 <= ms < 1 << 32 for ms in times)):
+            raise ValueError("event_times must hold one millisecond count per event")
+    
+    def game_view(self, session_id, game):
+        """What a client may see of a game: everything but the solution"""
+        game.update_time()
+        size = game.geometry.size
+        return {
+            'id': session_id,
+            'size': size,
+            'difficulty': game.difficulty,
+            'board': PuzzleCodec.board_to_line(game.board),
+            'initial_board': PuzzleCodec.board_to_line(game.initial_board),
+            'notes': [mask for row in game.notes for mask in row],
+            'conflicts': sorted(r * size + c for r, c in game.conflicting_cells()),
+            'elapsed_time': game.elapsed_time,
+            'hints_used': game.hints_used,
+            'mistakes': game.mistakes,
+            'game_active': game.game_active
+        }
+    
+    def _cell(self, game, params):
+        size = game.geometry.size
+        row, col = int(params['row']), int(params['col'])
+        if not (0 <= row < size and 0 <= col < size):
+            raise ValueError(f"row and col must be 0-{size - 1}")
+        return row, col
+    
+    def place(self, session_id, game, params):
+        row, col = self._cell(game, params)
+        ok, message = game.place_number(row, col, int(params['num']))
+        return dict(self.game_view(session_id, game), ok=ok, message=message)
+    
+    def clear(self, session_id, game, params):
+        game.clear_cell(*self._cell(game, params))
+        return self.game_view(session_id, game)
+    
+    def note(self, session_id, game, params):
+        num = int(params['num'])
+        if not 1 <= num <= game.geometry.size:
+            raise ValueError(f"num must be 1-{game.geometry.size}")
+        game.toggle_note(*self._cell(game, params), num)
+        return self.game_view(session_id, game)
+    
+    def hint(self, session_id, game, params):
+        if params.get('logical'):
+            step = game.get_logical_hint()
+            hint = None if step is None else {
+                'technique': step.technique,
+                'level': step.level,
+                'explanation': LogicalSolver.describe(step),
+                'cells': step.cells,
+                'eliminations': step.eliminations,
+                'placement': step.placement
+            }
+        else:
+            cell = game.get_hint()
+            hint = None if cell is None else {'placement': cell}
+        return dict(self.game_view(session_id, game), hint=hint)
+    
+    def undo(self, session_id, game, params):
+        game.undo()
+        return self.game_view(session_id, game)
+    
+    def redo(self, session_id, game, params):
+        game.redo()
+        return self.game_view(session_id, game)
+    
+    def check(self, session_id, game, params):
+        return dict(self.game_view(session_id, game), solved=game.check_solution())
+    
+    def save(self, session_id, game, params):
+        return game.get_state(json_notes=True)
+    
+    ACTIONS = {
+        'place': place,
+        'clear': clear,
+        'note': note,
+        'hint': hint,
+        'undo': undo,
+        'redo': redo,
+        'check': check,
+        'save': save
+    }
+
+
+class SudokuClient:
+    """Blocking client for a SudokuServer, for scripts and local testing"""
+    
+    def __init__(self, host="127.0.0.1", port=8080, timeout=30):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    
+    def request(self, method, path, params=None):
+        """Send one request; returns (status, decoded JSON)"""
+        body = json.dumps(params) if params is not None else None
+        headers = {'Content-Type': "application/json"} if body else {}
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+    
+    def new_game(self, difficulty="Medium", seed=None, size=9):
+        return self.request("POST", "/games",
+                            {'difficulty': difficulty, 'seed': seed, 'size': size})
+    
+    def place(self, session_id, row, col, num):
+        return self.request("POST", f"/games/{session_id}/place",
+                            {'row': row, 'col': col, 'num': num})
+    
+    def close(self):
+        self.connection.close()
+
+
+def serve(host="127.0.0.1", port=8080, workers=None, solver="dlx", graded=False,
+          max_sessions=10000, idle_timeout=1800):
+    """Run a server until interrupted"""
+    server = SudokuServer(host, port, workers, solver, graded,
+                          SessionStore(max_sessions, idle_timeout))
+    
+    async def run():
+        await server.start()
+        print(f"Serving Sudoku on http://{server.host}:{server.port}")
+        try:
+            await server.server.serve_forever()
+        finally:
+            await server.close()
+    
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,960 @@
+"""Tkinter user interface for the Sudoku engine"""
+import tkinter as tk
+from tkinter import ttk, messagebox, font
+import os
+import queue
+import threading
+from datetime import datetime
+
+from sudoku_engine import GenerationCancelled, LogicalSolver, PuzzlePool, SudokuGame
+
+
+class SudokuUI:
+    """Sudoku game user interface"""
+    
+    # Board side for each entry of the size selector
+    SIZES = {"4x4": 4, "9x9": 9, "16x16": 16, "25x25": 25}
+    
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Advanced Sudoku")
+        self.root.geometry("900x700")
+        self.root.resizable(True, True)
+        
+        # Game instance, with ready puzzles kept in a pool
+        self.pool = PuzzlePool(graded=True)
+        self.game = SudokuGame(pool=self.pool, graded=True)
+        self.game.add_listener(self.on_cells_changed)
+        
+        # Colors
+        self.colors = {
+            'bg': '#f0f0f0',
+            'grid_bg': '#ffffff',
+            'cell_bg': '#ffffff',
+            'initial_cell_bg': '#e8f4f8',
+            'selected_cell_bg': '#c9e9ff',
+            'conflict_cell_bg': '#ffcccc',
+            'same_number_bg': '#e6f7ff',
+            'highlight_bg': '#f0f8ff',
+            'note_mode_initial_bg': '#f0f0f0',
+            'hint_cell_bg': '#fff3c4',
+            'grid_line': '#000000',
+            'thick_line': '#000000',
+            'text': '#000000',
+            'initial_text': '#0000aa',
+            'note_text': '#666666',
+            'button_bg': '#4a86e8',
+            'button_fg': '#ffffff',
+            'timer_bg': '#333333',
+            'timer_fg': '#ffffff'
+        }
+        
+        # Fonts
+        self.cell_font = font.Font(family="Arial", size=20, weight="bold")
+        self.note_font = font.Font(family="Arial", size=9)
+        self.board_font = font.Font(family="Arial", size=20, weight="bold")
+        self.button_font = font.Font(family="Arial", size=11)
+        self.timer_font = font.Font(family="Courier", size=14, weight="bold")
+        self.title_font = font.Font(family="Arial", size=18, weight="bold")
+        
+        # Variables
+        self.selected_cell = None
+        self.number_buttons = []
+        self.size = 0
+        self.cell_rects = []
+        self.cell_texts = []
+        self.grid_lines = []
+        self.painted = []
+        self.painted_selected_value = 0
+        self.hint_cells = set()
+        self.timer_running = False
+        self.highlight_same = True
+        
+        # Background generation state
+        self.generating = False
+        self.generation_id = 0
+        self.generation_cancel = None
+        self.generation_results = queue.Queue()
+        self.poll_job = None
+        self.spinner_index = 0
+        
+        self.setup_ui()
+        self.start_timer()
+    
+    def setup_ui(self):
+        """Setup the user interface"""
+        # Main container
+        main_frame = ttk.Frame(self.root)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Top frame - Title and controls
+        top_frame = ttk.Frame(main_frame)
+        top_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        # Title
+        title_label = tk.Label(
+            top_frame,
+            text="Advanced Sudoku",
+            font=self.title_font,
+            bg=self.colors['bg']
+        )
+        title_label.pack(side=tk.LEFT, padx=(0, 20))
+        
+        # Difficulty selector
+        diff_frame = ttk.Frame(top_frame)
+        diff_frame.pack(side=tk.LEFT, padx=20)
+        
+        tk.Label(diff_frame, text="Difficulty:").pack(side=tk.LEFT, padx=(0, 5))
+        self.difficulty_var = tk.StringVar(value="Medium")
+        difficulties = ["Easy", "Medium", "Hard", "Expert", "Master"]
+        diff_menu = ttk.Combobox(
+            diff_frame,
+            textvariable=self.difficulty_var,
+            values=difficulties,
+            state="readonly",
+            width=10
+        )
+        diff_menu.pack(side=tk.LEFT)
+        diff_menu.bind("<<ComboboxSelected>>", self.change_difficulty)
+        
+        # Board size selector
+        tk.Label(diff_frame, text="Size:").pack(side=tk.LEFT, padx=(10, 5))
+        self.size_var = tk.StringVar(value="9x9")
+        size_menu = ttk.Combobox(
+            diff_frame,
+            textvariable=self.size_var,
+            values=list(self.SIZES),
+            state="readonly",
+            width=6
+        )
+        size_menu.pack(side=tk.LEFT)
+        size_menu.bind("<<ComboboxSelected>>", self.change_size)
+        
+        # New game button
+        new_game_btn = tk.Button(
+            top_frame,
+            text="New Game",
+            font=self.button_font,
+            bg=self.colors['button_bg'],
+            fg=self.colors['button_fg'],
+            command=self.new_game
+        )
+        new_game_btn.pack(side=tk.LEFT, padx=10)
+        
+        # Middle frame - Game board and controls
+        middle_frame = ttk.Frame(main_frame)
+        middle_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Left panel - Game board
+        board_frame = ttk.Frame(middle_frame)
+        board_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Create Sudoku grid
+        self.create_board(board_frame)
+        
+        # Right panel - Controls and info
+        control_frame = ttk.Frame(middle_frame, width=200)
+        control_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=(10, 0))
+        control_frame.pack_propagate(False)
+        
+        # Timer display
+        timer_frame = tk.Frame(control_frame, bg=self.colors['timer_bg'])
+        timer_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.timer_label = tk.Label(
+            timer_frame,
+            text="00:00:00",
+            font=self.timer_font,
+            bg=self.colors['timer_bg'],
+            fg=self.colors['timer_fg'],
+            padx=10,
+            pady=5
+        )
+        self.timer_label.pack()
+        
+        # Generation status
+        self.status_label = tk.Label(
+            control_frame,
+            text="",
+            font=self.button_font
+        )
+        self.status_label.pack(fill=tk.X, pady=(0, 10))
+        
+        # Stats frame
+        stats_frame = ttk.LabelFrame(control_frame, text="Statistics", padding=10)
+        stats_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.hints_label = tk.Label(
+            stats_frame,
+            text="Hints: 0",
+            font=self.button_font
+        )
+        self.hints_label.pack(anchor=tk.W, pady=2)
+        
+        self.mistakes_label = tk.Label(
+            stats_frame,
+            text="Mistakes: 0",
+            font=self.button_font
+        )
+        self.mistakes_label.pack(anchor=tk.W, pady=2)
+        
+        self.diff_label = tk.Label(
+            stats_frame,
+            text="Difficulty: Medium",
+            font=self.button_font
+        )
+        self.diff_label.pack(anchor=tk.W, pady=2)
+        
+        # Game control buttons
+        btn_frame = ttk.LabelFrame(control_frame, text="Game Controls", padding=10)
+        btn_frame.pack(fill=tk.X)
+        
+        buttons = [
+            ("Hint", self.give_hint),
+            ("Logic Hint", self.give_logical_hint),
+            ("Check Solution", self.check_solution),
+            ("Solve Puzzle", self.solve_puzzle),
+            ("Clear Cell", self.clear_selected),
+            ("Undo", self.undo_move),
+            ("Redo", self.redo_move)
+        ]
+        
+        for text, command in buttons:
+            btn = tk.Button(
+                btn_frame,
+                text=text,
+                font=self.button_font,
+                bg=self.colors['button_bg'],
+                fg=self.colors['button_fg'],
+                command=command,
+                width=15
+            )
+            btn.pack(pady=2)
+        
+        # Options frame
+        options_frame = ttk.LabelFrame(control_frame, text="Options", padding=10)
+        options_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        # Highlight options
+        self.highlight_var = tk.BooleanVar(value=True)
+        highlight_cb = tk.Checkbutton(
+            options_frame,
+            text="Highlight conflicts",
+            variable=self.highlight_var,
+            font=self.button_font,
+            command=self.toggle_highlight
+        )
+        highlight_cb.pack(anchor=tk.W, pady=2)
+        
+        self.highlight_same_var = tk.BooleanVar(value=True)
+        highlight_same_cb = tk.Checkbutton(
+            options_frame,
+            text="Highlight same numbers",
+            variable=self.highlight_same_var,
+            font=self.button_font,
+            command=self.toggle_highlight_same
+        )
+        highlight_same_cb.pack(anchor=tk.W, pady=2)
+        
+        # Note mode toggle
+        self.note_mode_var = tk.BooleanVar(value=False)
+        note_btn = tk.Checkbutton(
+            options_frame,
+            text="Note Mode (Pencil Marks)",
+            variable=self.note_mode_var,
+            font=self.button_font,
+            command=self.toggle_note_mode
+        )
+        note_btn.pack(anchor=tk.W, pady=2)
+        
+        # Auto notes toggle
+        self.auto_notes_var = tk.BooleanVar(value=False)
+        auto_notes_cb = tk.Checkbutton(
+            options_frame,
+            text="Auto Notes (Candidates)",
+            variable=self.auto_notes_var,
+            font=self.button_font,
+            command=self.toggle_auto_notes
+        )
+        auto_notes_cb.pack(anchor=tk.W, pady=2)
+        
+        # Bottom frame - Number pad
+        bottom_frame = ttk.Frame(main_frame)
+        bottom_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        # Number buttons, rebuilt by create_number_pad for each board size
+        self.num_frame = ttk.Frame(bottom_frame)
+        self.num_frame.pack()
+        self.create_number_pad()
+        
+        # Save/Load buttons
+        save_load_frame = ttk.Frame(bottom_frame)
+        save_load_frame.pack(pady=(10, 0))
+        
+        save_btn = tk.Button(
+            save_load_frame,
+            text="Save Game",
+            font=self.button_font,
+            bg="#27ae60",
+            fg="white",
+            command=self.save_game
+        )
+        save_btn.pack(side=tk.LEFT, padx=5)
+        
+        load_btn = tk.Button(
+            save_load_frame,
+            text="Load Game",
+            font=self.button_font,
+            bg="#f39c12",
+            fg="white",
+            command=self.load_game
+        )
+        load_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Initialize with a new game
+        self.new_game()
+    
+    def create_number_pad(self):
+        """One button per symbol of the board, in rows of at most 13"""
+        for widget in self.num_frame.winfo_children():
+            widget.destroy()
+        self.number_buttons = []
+        
+        geometry = self.game.geometry
+        rows = -(-geometry.size // 13)
+        columns = -(-geometry.size // rows)
+        for i in range(1, geometry.size + 1):
+            btn = tk.Button(
+                self.num_frame,
+                text=geometry.symbol(i),
+                font=self.cell_font,
+                width=3 if geometry.size <= 9 else 2,
+                height=1,
+                bg=self.colors['button_bg'],
+                fg=self.colors['button_fg'],
+                command=lambda n=i: self.number_click(n)
+            )
+            btn.grid(row=(i - 1) // columns, column=(i - 1) % columns, padx=2, pady=1)
+            self.number_buttons.append(btn)
+        
+        # Clear button
+        clear_btn = tk.Button(
+            self.num_frame,
+            text="Clear",
+            font=self.button_font,
+            width=6,
+            height=1,
+            bg="#e74c3c",
+            fg="white",
+            command=self.clear_click
+        )
+        clear_btn.grid(row=0, column=columns, rowspan=rows, padx=2)
+    
+    def create_board(self, parent):
+        """Create the board canvas; create_cells fills it for the game's size"""
+        board_canvas = tk.Canvas(
+            parent,
+            bg=self.colors['grid_bg'],
+            highlightthickness=0
+        )
+        board_canvas.pack(fill=tk.BOTH, expand=True)
+        
+        # Bind events
+        board_canvas.bind("<Configure>", self.resize_board)
+        board_canvas.bind("<Button-1>", self.board_click)
+        
+        self.board_canvas = board_canvas
+        self.create_cells()
+    
+    def create_cells(self):
+        """Create canvas items for every cell and grid line of the game's board"""
+        board_canvas = self.board_canvas
+        board_canvas.delete("all")
+        size = self.game.geometry.size
+        self.size = size
+        self.cell_size = 0
+        self.cell_rects = [[None] * size for _ in range(size)]
+        self.cell_texts = [[None] * size for _ in range(size)]
+        self.painted = [[None] * size for _ in range(size)]
+        self.painted_selected_value = 0
+        self.grid_lines = []
+        
+        # One rectangle and one text item per cell, positioned on resize
+        for row in range(size):
+            for col in range(size):
+                self.cell_rects[row][col] = board_canvas.create_rectangle(
+                    0, 0, 0, 0,
+                    fill=self.colors['cell_bg'],
+                    outline="",
+                    tags=("cell", f"cell_{row}_{col}")
+                )
+                self.cell_texts[row][col] = board_canvas.create_text(
+                    0, 0,
+                    text="",
+                    font=self.board_font,
+                    fill=self.colors['text'],
+                    justify=tk.CENTER,
+                    tags=("value", f"value_{row}_{col}")
+                )
+        
+        self.draw_grid()
+        self.resize_board()
+        
+    def resize_board(self, event=None):
+        """Resize the board when window size changes"""
+        if not self.board_canvas:
+            return
+            
+        width = self.board_canvas.winfo_width()
+        height = self.board_canvas.winfo_height()
+        
+        # Calculate cell size
+        size = self.size
+        cell_size = min(width, height) // (size + 1)
+        if cell_size == self.cell_size or cell_size <= 0:
+            return
+        self.cell_size = cell_size
+        
+        # Move existing items; fonts are rescaled in place
+        for row in range(size):
+            for col in range(size):
+                x = col * cell_size
+                y = row * cell_size
+                self.board_canvas.coords(
+                    self.cell_rects[row][col],
+                    x, y, x + cell_size, y + cell_size
+                )
+                self.board_canvas.coords(
+                    self.cell_texts[row][col],
+                    x + cell_size // 2, y + cell_size // 2
+                )
+        
+        for i, line_v, line_h in self.grid_lines:
+            offset = i * cell_size
+            self.board_canvas.coords(line_v, offset, 0, offset, size * cell_size)
+            self.board_canvas.coords(line_h, 0, offset, size * cell_size, offset)
+        
+        # Notes are laid out box x box inside a cell
+        self.board_font.configure(size=-max(cell_size * 2 // 5, 1))
+        self.note_font.configure(size=-max(cell_size // (self.game.geometry.box + 2), 1))
+    
+    def draw_grid(self):
+        """Create the Sudoku grid lines; resize_board positions them"""
+        # Thin lines first so the thick box lines are drawn on top
+        box = self.game.geometry.box
+        lines = range(self.size + 1)
+        for i in [i for i in lines if i % box] + [i for i in lines if i % box == 0]:
+            if i % box == 0:
+                width = 3
+                color = self.colors['thick_line']
+            else:
+                width = 1
+                color = self.colors['grid_line']
+            line_v = self.board_canvas.create_line(
+                0, 0, 0, 0, width=width, fill=color, tags=("grid_line",)
+            )
+            line_h = self.board_canvas.create_line(
+                0, 0, 0, 0, width=width, fill=color, tags=("grid_line",)
+            )
+            self.grid_lines.append((i, line_v, line_h))
+    
+    def update_board_display(self):
+        """Update the display with current board state"""
+        size = self.size
+        self.refresh_cells([(r, c) for r in range(size) for c in range(size)])
+    
+    def on_cells_changed(self, cells):
+        """Repaint after the game reports changed cells (None means all)"""
+        if cells is None:
+            if self.game.geometry.size != self.size:
+                # A game of another size was loaded
+                self.create_cells()
+                self.create_number_pad()
+                self.size_var.set(f"{self.size}x{self.size}")
+            self.update_board_display()
+            return
+        
+        self.refresh_cells(cells)
+    
+    def refresh_cells(self, cells):
+        """Repaint the given cells plus any whose same-number highlight moved"""
+        cells = set(cells)
+        selected_value = self.get_selected_value() if self.highlight_same_var.get() else 0
+        if selected_value != self.painted_selected_value:
+            for value in (selected_value, self.painted_selected_value):
+                if value:
+                    cells.update((r, c) for r in range(self.size) for c in range(self.size)
+                                 if self.game.board[r][c] == value)
+            self.painted_selected_value = selected_value
+        
+        for row, col in cells:
+            self.paint_cell(row, col, selected_value)
+        
+        # Update stats
+        self.update_stats()
+    
+    def paint_cell(self, row, col, selected_value):
+        """Bring one cell's canvas items up to date with the game"""
+        value = self.game.board[row][col]
+        initial = self.game.initial_board[row][col] != 0
+        
+        # Set cell background
+        if initial:
+            if self.note_mode_var.get():
+                bg = self.colors['note_mode_initial_bg']
+            else:
+                bg = self.colors['initial_cell_bg']
+        elif self.selected_cell and self.selected_cell == (row, col):
+            bg = self.colors['selected_cell_bg']
+        elif (row, col) in self.hint_cells:
+            bg = self.colors['hint_cell_bg']
+        else:
+            bg = self.colors['cell_bg']
+        
+        # Highlight conflicts
+        if self.highlight_var.get() and self.game.is_conflicting(row, col):
+            bg = self.colors['conflict_cell_bg']
+        
+        # Highlight same numbers
+        if selected_value and value == selected_value:
+            bg = self.colors['same_number_bg']
+        
+        geometry = self.game.geometry
+        if value != 0:
+            text = geometry.symbol(value)
+            cell_font = self.board_font
+            fg = self.colors['initial_text'] if initial else self.colors['text']
+        else:
+            # Show notes if any
+            notes = self.game.get_notes(row, col)
+            text = ""
+            if notes:
+                box = geometry.box
+                for i in range(geometry.size):
+                    text += geometry.symbol(i + 1) if notes >> i & 1 else " "
+                    if i % box == box - 1 and i < geometry.size - 1:
+                        text += "\n"
+            cell_font = self.note_font
+            fg = self.colors['note_text']
+        
+        # Only touch Tk when something visible changed
+        state = (bg, text, fg, cell_font is self.board_font)
+        if self.painted[row][col] == state:
+            return
+        if self.painted[row][col] is None or self.painted[row][col][0] != bg:
+            self.board_canvas.itemconfig(self.cell_rects[row][col], fill=bg)
+        self.board_canvas.itemconfig(
+            self.cell_texts[row][col],
+            text=text,
+            font=cell_font,
+            fill=fg
+        )
+        self.painted[row][col] = state
+    
+    def update_stats(self):
+        """Update statistics display"""
+        self.hints_label.config(text=f"Hints: {self.game.hints_used}")
+        self.mistakes_label.config(text=f"Mistakes: {self.game.mistakes}")
+        self.diff_label.config(text=f"Difficulty: {self.game.difficulty}")
+    
+    def board_click(self, event):
+        """Handle click on the board"""
+        if not self.game.game_active or self.generating:
+            return
+            
+        col = event.x // self.cell_size
+        row = event.y // self.cell_size
+        
+        if 0 <= row < self.size and 0 <= col < self.size:
+            # Don't select initial cells if in note mode
+            if self.note_mode_var.get() and self.game.initial_board[row][col] != 0:
+                return
+                
+            self.select_cell((row, col))
+    
+    def number_click(self, number):
+        """Handle number button click"""
+        if not self.selected_cell or not self.game.game_active:
+            return
+            
+        row, col = self.selected_cell
+        
+        # Don't modify initial cells
+        if self.game.initial_board[row][col] != 0:
+            messagebox.showwarning("Warning", "Cannot modify initial numbers!")
+            return
+        
+        message = None
+        if self.note_mode_var.get():
+            # Add/remove note
+            self.game.toggle_note(row, col, number)
+        else:
+            # Place number
+            success, message = self.game.place_number(row, col, number)
+            
+            if not success:
+                messagebox.showwarning("Warning", message)
+        
+        self.update_stats()
+        
+        # Check if game is complete
+        if message == "Puzzle completed!":
+            self.game_complete()
+    
+    def key_press(self, char):
+        """Enter the value of a typed digit or letter symbol"""
+        value = self.game.geometry.value_of(char) if char else 0
+        if value:
+            self.number_click(value)
+    
+    def clear_click(self):
+        """Handle clear button click"""
+        if not self.selected_cell or not self.game.game_active:
+            return
+            
+        row, col = self.selected_cell
+        
+        # Don't clear initial cells
+        if self.game.initial_board[row][col] != 0:
+            messagebox.showwarning("Warning", "Cannot clear initial numbers!")
+            return
+        
+        self.game.clear_cell(row, col)
+    
+    def clear_selected(self):
+        """Clear the selected cell"""
+        if self.selected_cell:
+            self.clear_click()
+    
+    def new_game(self):
+        """Start a new game"""
+        difficulty = self.difficulty_var.get()
+        size = self.SIZES.get(self.size_var.get(), 9)
+        
+        # A newer request makes any running one stale
+        if self.generation_cancel is not None:
+            self.generation_cancel.set()
+        self.generation_id += 1
+        self.generation_cancel = None
+        
+        # The pool only holds 9x9 puzzles
+        puzzle = self.pool.take(difficulty) if size == self.pool.size else None
+        if puzzle is not None:
+            if self.generating:
+                self.generating = False
+                self.root.after_cancel(self.poll_job)
+                self.status_label.config(text="")
+            self.start_new_game(difficulty, puzzle[0], puzzle[1])
+            return
+        
+        self.generation_cancel = threading.Event()
+        
+        worker = threading.Thread(
+            target=self.generate_in_background,
+            args=(self.generation_id, difficulty, size, self.generation_cancel),
+            daemon=True
+        )
+        worker.start()
+        
+        if not self.generating:
+            self.generating = True
+            self.poll_job = self.root.after(50, self.poll_generation)
+    
+    def generate_in_background(self, request_id, difficulty, size, cancel):
+        """Worker thread: generate a puzzle on a separate game instance"""
+        generator = SudokuGame(self.game.solver.name, graded=self.game.graded, size=size)
+        try:
+            generator.generate_puzzle(difficulty, cancel=cancel)
+        except GenerationCancelled:
+            return
+        self.generation_results.put(
+            (request_id, difficulty, generator.board, generator.solution)
+        )
+    
+    def poll_generation(self):
+        """Pick up finished puzzles from the worker thread"""
+        while not self.generation_results.empty():
+            request_id, difficulty, board, solution = self.generation_results.get()
+            if request_id == self.generation_id:
+                self.generating = False
+                self.generation_cancel = None
+                self.status_label.config(text="")
+                self.start_new_game(difficulty, board, solution)
+                return
+        
+        spinner = "|/-\\"
+        self.spinner_index = (self.spinner_index + 1) % len(spinner)
+        self.status_label.config(
+            text=f"Generating puzzle {spinner[self.spinner_index]}"
+        )
+        self.poll_job = self.root.after(50, self.poll_generation)
+    
+    def start_new_game(self, difficulty, board, solution):
+        """Show a freshly generated puzzle"""
+        self.selected_cell = None
+        self.hint_cells = set()
+        self.game.load_puzzle(board, solution, difficulty)
+        self.start_timer()
+        
+        messagebox.showinfo("New Game", f"New {difficulty} puzzle generated!")
+    
+    def change_difficulty(self, event=None):
+        """Change game difficulty"""
+        if self.game.game_active:
+            response = messagebox.askyesno(
+                "Change Difficulty",
+                "Changing difficulty will start a new game. Continue?"
+            )
+            if response:
+                self.new_game()
+    
+    def change_size(self, event=None):
+        """Start a new game on a board of the selected size"""
+        if self.game.game_active:
+            response = messagebox.askyesno(
+                "Change Size",
+                "Changing the board size will start a new game. Continue?"
+            )
+            if not response:
+                self.size_var.set(f"{self.size}x{self.size}")
+                return
+        self.new_game()
+    
+    def give_hint(self):
+        """Give a hint to the player"""
+        if not self.game.game_active:
+            messagebox.showinfo("Game Complete", "The puzzle is already solved!")
+            return
+            
+        hint = self.game.get_hint()
+        if hint:
+            row, col, value = hint
+            self.select_cell((row, col))
+            
+            # Check if game is complete
+            if self.game.check_solution():
+                self.game_complete()
+        else:
+            messagebox.showinfo("Hint", "No empty cells remaining!")
+    
+    def give_logical_hint(self):
+        """Show the next logical step and highlight the cells it uses"""
+        if not self.game.game_active:
+            messagebox.showinfo("Game Complete", "The puzzle is already solved!")
+            return
+        
+        step = self.game.get_logical_hint()
+        if step is None:
+            messagebox.showinfo("Hint", "No empty cells remaining!")
+            return
+        
+        self.set_hint_cells(step.cells)
+        if step.technique == "Incorrect Entry":
+            messagebox.showinfo("Hint", f"{len(step.cells)} highlighted cell(s) are wrong.")
+            return
+        
+        messagebox.showinfo("Hint", LogicalSolver.describe(step))
+        if self.game.check_solution():
+            self.game_complete()
+    
+    def set_hint_cells(self, cells):
+        """Highlight the cells of the last logical hint"""
+        old = self.hint_cells
+        self.hint_cells = set(cells)
+        self.refresh_cells(old | self.hint_cells)
+    
+    def check_solution(self):
+        """Check the current solution"""
+        if not self.game.game_active:
+            messagebox.showinfo("Game Complete", "The puzzle is already solved!")
+            return
+            
+        if self.game.check_solution():
+            messagebox.showinfo("Solution Check", "Congratulations! Your solution is correct!")
+            self.game_complete()
+        else:
+            incorrect_cells = []
+            for row in range(self.size):
+                for col in range(self.size):
+                    if (self.game.board[row][col] != 0 and 
+                        self.game.board[row][col] != self.game.solution[row][col]):
+                        incorrect_cells.append((row, col))
+            
+            message = f"Found {len(incorrect_cells)} incorrect cells."
+            if incorrect_cells:
+                message += "\n\nIncorrect cells (row, column):\n"
+                for i, (r, c) in enumerate(incorrect_cells[:10]):
+                    message += f"({r+1}, {c+1}) "
+                    if (i + 1) % 5 == 0:
+                        message += "\n"
+            
+            messagebox.showinfo("Solution Check", message)
+    
+    def solve_puzzle(self):
+        """Solve the entire puzzle"""
+        if not self.game.game_active:
+            messagebox.showinfo("Game Complete", "The puzzle is already solved!")
+            return
+            
+        response = messagebox.askyesno(
+            "Solve Puzzle",
+            "This will solve the entire puzzle. Are you sure?"
+        )
+        
+        if response:
+            self.game.solve_puzzle()
+            self.game_complete()
+    
+    def toggle_highlight(self):
+        """Toggle conflict highlighting"""
+        self.game.highlight_conflicts = self.highlight_var.get()
+        self.update_board_display()
+    
+    def toggle_highlight_same(self):
+        """Toggle same number highlighting"""
+        self.highlight_same = self.highlight_same_var.get()
+        self.update_board_display()
+    
+    def toggle_note_mode(self):
+        """Toggle note/pencil mark mode"""
+        # Initial cells are greyed out while note mode is on
+        self.update_board_display()
+    
+    def toggle_auto_notes(self):
+        """Toggle live candidate pencil marks"""
+        self.game.set_auto_notes(self.auto_notes_var.get())
+    
+    def select_cell(self, cell):
+        """Select a cell (or None) and repaint what the selection affects"""
+        if self.hint_cells:
+            self.set_hint_cells(())
+        self.selected_cell = cell
+        self.game.select_cell(cell)
+    
+    def get_selected_value(self):
+        """Get value of selected cell"""
+        if self.selected_cell:
+            row, col = self.selected_cell
+            return self.game.board[row][col]
+        return 0
+    
+    def undo_move(self):
+        """Undo the last move"""
+        cells = self.game.undo()
+        if cells:
+            self.select_cell(cells[-1])
+        self.update_stats()
+    
+    def redo_move(self):
+        """Redo the last undone move"""
+        cells = self.game.redo()
+        if cells:
+            self.select_cell(cells[-1])
+        self.update_stats()
+    
+    def start_timer(self):
+        """Start or restart the game timer"""
+        self.timer_running = True
+        self.update_timer()
+    
+    def update_timer(self):
+        """Update the timer display"""
+        if self.timer_running and self.game.game_active:
+            self.game.update_time()
+            
+            # Format time
+            hours = self.game.elapsed_time // 3600
+            minutes = (self.game.elapsed_time % 3600) // 60
+            seconds = self.game.elapsed_time % 60
+            
+            time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+            self.timer_label.config(text=time_str)
+            
+            # Schedule next update
+            self.root.after(1000, self.update_timer)
+    
+    def game_complete(self):
+        """Handle game completion"""
+        self.game.game_active = False
+        self.timer_running = False
+        
+        # Calculate score
+        score = self.calculate_score()
+        
+        # Show completion message
+        hours = self.game.elapsed_time // 3600
+        minutes = (self.game.elapsed_time % 3600) // 60
+        seconds = self.game.elapsed_time % 60
+        
+        message = (
+            f"🎉 Puzzle Completed! 🎉\n\n"
+            f"Difficulty: {self.game.difficulty}\n"
+            f"Time: {hours:02d}:{minutes:02d}:{seconds:02d}\n"
+            f"Hints used: {self.game.hints_used}\n"
+            f"Mistakes: {self.game.mistakes}\n"
+            f"Score: {score}\n\n"
+            f"Well done!"
+        )
+        
+        messagebox.showinfo("Puzzle Complete", message)
+    
+    def calculate_score(self):
+        """Calculate a score based on performance"""
+        # Base score for completing
+        score = 1000
+        
+        # Deductions
+        time_penalty = min(self.game.elapsed_time // 60, 500)  # 1 point per minute
+        hint_penalty = self.game.hints_used * 50
+        mistake_penalty = self.game.mistakes * 25
+        
+        # Difficulty multiplier
+        multipliers = {
+            "Easy": 1,
+            "Medium": 2,
+            "Hard": 3,
+            "Expert": 4,
+            "Master": 5
+        }
+        
+        multiplier = multipliers.get(self.game.difficulty, 1)
+        
+        final_score = max(0, (score - time_penalty - hint_penalty - mistake_penalty) * multiplier)
+        
+        return final_score
+    
+    def save_game(self):
+        """Save the current game"""
+        if not self.game.game_active:
+            messagebox.showinfo("Save Game", "No active game to save!")
+            return
+            
+        # The binary format only holds 9x9 games; other sizes save as JSON
+        extension = "sdkb" if self.game.geometry.size == 9 else "json"
+        filename = f"sudoku_save_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        self.game.save_game(filename)
+        messagebox.showinfo("Save Game", f"Game saved as {filename}")
+    
+    def load_game(self):
+        """Load a saved game"""
+        # Note: This is a simplified version
+        # In a full implementation, you'd use filedialog
+        response = messagebox.askyesno(
+            "Load Game",
+            "This will load the last saved game. Continue?"
+        )
+        
+        if response:
+            # Try to load the most recent save
+            import glob
+            saves = glob.glob("sudoku_save_*.json") + glob.glob("sudoku_save_*.sdkb")
+            if saves:
+                latest = max(saves, key=os.path.getctime)
+                self.selected_cell = None
+                if self.game.load_game(latest):
+                    self.start_timer()
+                    messagebox.showinfo("Load Game", f"Game loaded from {latest}")
+                else:
+                    messagebox.showerror("Load Game", "Failed to load game!")
+            else:
+                messagebox.showinfo("Load Game", "No saved games found!")